@@ -0,0 +1,62 @@
+"""
+Duplicate finder benchmark: MinHash / LSH (duplicate_engine.find_duplicate_groups)
+against the pairwise Jaccard reference on a synthetic OCR-like corpus.
+
+    python bench_duplicates.py                 # 2k / 20k / 100k docs
+    python bench_duplicates.py --sizes 5000 --pairwise-max 5000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from duplicate_engine import MinHasher, find_duplicate_groups, pairwise_groups
+
+
+def make_corpus(n, seed=7, dup_share=0.1):
+    """n word sets; about dup_share of them are copies of another doc with one word changed."""
+    rng = random.Random(seed)
+    vocab = [f"w{k}" for k in range(50000)]
+    docs = []
+    for _ in range(n):
+        if docs and rng.random() < dup_share:
+            words = set(rng.choice(docs))
+            if len(words) > 30:
+                words.discard(next(iter(words)))
+                words.add(rng.choice(vocab))
+        else:
+            words = set(rng.sample(vocab, rng.randint(40, 300)))
+        docs.append(words)
+    return docs
+
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000, 100000])
+    ap.add_argument("--threshold", type=float, default=0.95)
+    ap.add_argument("--pairwise-max", type=int, default=2000, help="largest size the O(n^2) reference runs on")
+    args = ap.parse_args()
+
+    hasher = MinHasher()
+    for n in args.sizes:
+        docs = make_corpus(n)
+        sigs, t_sig = timed(lambda: np.stack([hasher.signature(w) for w in docs]))
+        groups, t_lsh = timed(lambda: find_duplicate_groups(sigs, docs.__getitem__, args.threshold))
+        line = f"n={n:>7}  signatures {t_sig:7.2f}s  lsh+verify {t_lsh:6.2f}s  groups {len(groups)}"
+        if n <= args.pairwise_max:
+            ref, t_ref = timed(lambda: pairwise_groups(docs, args.threshold))
+            line += f"  | pairwise {t_ref:7.2f}s  groups {len(ref)}  same={groups == ref}"
+        else:
+            line += f"  | pairwise ~{n * (n - 1) / 2 / 1e6:.0f}M pairs, skipped"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
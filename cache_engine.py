@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe least-recently-used map with a fixed number of entries."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ResultCache(LRUCache):
+    """
+    Search results for one index generation. A lookup or store with a
+    different generation drops everything cached for the old one, so a
+    re-index or tag edit can never serve stale results.
+    """
+
+    def __init__(self, maxsize=64):
+        super().__init__(maxsize)
+        self.generation = None
+
+    def _sync(self, generation):
+        if generation != self.generation:
+            self.clear()
+            self.generation = generation
+
+    def lookup(self, key, generation):
+        self._sync(generation)
+        results = self.get(key)
+        return None if results is None else [dict(r) for r in results]
+
+    def store(self, key, generation, results):
+        self._sync(generation)
+        self.put(key, [dict(r) for r in results])
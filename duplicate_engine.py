@@ -0,0 +1,382 @@
+import hashlib
+import os
+import zlib
+
+import numpy as np
+from PIL import Image
+
+NUM_PERM = 128
+MAX_HASH = np.uint32(0xFFFFFFFF)  # signature value of a doc without words
+DHASH_KIND = "dhash64"
+DIGEST_KIND = "blake2b160"
+HEAD_BYTES = 64 * 1024  # read from every same-size candidate before hashing it fully
+READ_BLOCK = 1 << 20
+
+
+class MinHasher:
+    """
+    MinHash signatures of word sets: for each of num_perm multiply-shift
+    hash functions ((a * h + b) mod 2^64) >> 32, the smallest value over
+    the words. The share of
+    equal signature slots of two docs estimates their Jaccard similarity.
+    Word hashes are crc32, so signatures are stable across runs and can be
+    cached.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.kind = f"minhash{num_perm}-{seed}"
+        self.a = rng.randint(1, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, words):
+        """uint32 signature of a word set (all MAX_HASH when it is empty)."""
+        if not words:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        h = np.fromiter(
+            (zlib.crc32(w.encode("utf-8", "surrogateescape")) for w in words),
+            dtype=np.uint64,
+            count=len(words),
+        )
+        phv = (h[:, None] * self.a + self.b) >> np.uint64(32)
+        return phv.min(axis=0).astype(np.uint32)
+
+
+def _similar(a, b, threshold):
+    """Same test as the pairwise finder: Jaccard >= threshold on non-empty sets."""
+    if not a or not b:
+        return False
+    inter = len(a & b)
+    sim = inter / len(a | b)
+    if sim < 1.0 and inter < max(1, int(0.3 * min(len(a), len(b)))):
+        return False
+    return sim >= threshold
+
+
+def lsh_rows(threshold, num_perm=NUM_PERM, miss=0.001):
+    """
+    Rows per LSH band: the most selective banding (fewest false candidates)
+    that still makes a pair at `threshold` a candidate with probability
+    >= 1 - miss.
+    """
+    best = 1
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= 1.0 - miss:
+            best = rows
+    return best
+
+
+def _buckets(keys, min_size=2):
+    """Groups of row indices with equal keys (a 1-D array), at least min_size each."""
+    _, inv, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    inv = inv.ravel()
+    order = np.argsort(inv, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    for g in np.flatnonzero(counts >= min_size):
+        yield order[bounds[g]:bounds[g + 1]]
+
+
+def _row_keys(block):
+    block = np.ascontiguousarray(block)
+    return block.view(np.dtype((np.void, block.dtype.itemsize * block.shape[1]))).ravel()
+
+
+class _UnionFind:
+    """Disjoint sets over 0..n-1 with path halving; the first root wins a union."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[rj] = ri
+
+    def groups(self, ids):
+        """Sets of two or more of `ids`, each sorted by its first member."""
+        groups = {}
+        for i in ids:
+            groups.setdefault(self.find(i), []).append(int(i))
+        return sorted((g for g in groups.values() if len(g) >= 2), key=lambda g: g[0])
+
+
+def find_duplicate_groups(signatures, words_of, threshold=0.95, rows=None):
+    """
+    signatures: (n, num_perm) MinHash signatures, one row per doc.
+    words_of(i): word set of doc i; only called for candidate pairs.
+    Docs sharing all slots of one LSH band are candidates; a candidate pair
+    is joined when its exact Jaccard similarity reaches `threshold`.
+    Returns groups of doc indices (size >= 2), like pairwise_groups().
+    """
+    signatures = np.asarray(signatures, dtype=np.uint32)
+    n, num_perm = signatures.shape if signatures.ndim == 2 else (0, 0)
+    if n < 2:
+        return []
+    ids = np.flatnonzero(~(signatures == MAX_HASH).all(axis=1))
+    rows = rows or lsh_rows(threshold, num_perm)
+    sets = _UnionFind(n)
+    find = sets.find
+
+    def link(i, j):
+        if find(i) != find(j) and _similar(words_of(i), words_of(j), threshold):
+            sets.union(i, j)
+
+    # identical signatures first: check each against the first one, so a big
+    # cluster of equal texts enters the banding as a single representative
+    reps = []
+    sigs = signatures[ids]
+    seen = np.zeros(ids.size, dtype=bool)
+    for bucket in _buckets(_row_keys(sigs)):
+        first = int(ids[bucket[0]])
+        for k in bucket[1:]:
+            link(first, int(ids[k]))
+        seen[bucket] = True
+        reps.append(first)
+        reps.extend(int(ids[k]) for k in bucket[1:] if find(int(ids[k])) != find(first))
+    reps = np.array(sorted(set(reps) | set(ids[~seen].tolist())), dtype=np.int64)
+
+    if reps.size >= 2:
+        rep_sigs = signatures[reps]
+        for lo in range(0, num_perm - rows + 1, rows):
+            for bucket in _buckets(_row_keys(rep_sigs[:, lo:lo + rows])):
+                members = reps[bucket]
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        link(int(members[x]), int(members[y]))
+
+    return sets.groups(ids)
+
+
+def pairwise_groups(word_sets, threshold=0.95):
+    """
+    Reference finder: exact Jaccard over every pair of docs (O(n^2)).
+    Kept for the benchmark and for checking find_duplicate_groups.
+    """
+    n = len(word_sets)
+    sets = _UnionFind(n)
+    for i in range(n):
+        wi = word_sets[i]
+        if not wi:
+            continue
+        for j in range(i + 1, n):
+            wj = word_sets[j]
+            if wj and _similar(wi, wj, threshold):
+                sets.union(i, j)
+
+    return sets.groups(range(n))
+
+
+# ------------------ Visual near-duplicates ------------------
+def dhash(img, size=8):
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a
+    (size + 1) x size grayscale thumbnail, set where brightness increases.
+    size=8 gives a 64-bit int; near-identical images differ in few bits.
+    """
+    small = img.convert("L").resize((size + 1, size), Image.BILINEAR, reducing_gap=3.0)
+    px = np.asarray(small, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def dhash_file(path, size=8):
+    """dHash of an image file; JPEGs are decoded at reduced scale."""
+    with Image.open(path) as img:
+        img.draft("L", (size * 16, size * 16))
+        return dhash(img, size)
+
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming(a, b):
+    """Bitwise Hamming distance of uint64 arrays (broadcasting)."""
+    x = np.ascontiguousarray(np.bitwise_xor(a, b), dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(x)
+    return _POPCOUNT8[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+
+class MultiIndexHash:
+    """
+    Hamming-radius search over 64-bit hashes. Each hash is cut into
+    radius + 1 blocks; two hashes within `radius` bits of each other agree
+    exactly on at least one block (pigeonhole), so every block is an exact
+    match table and only hashes sharing a block are compared bit by bit.
+    """
+
+    def __init__(self, hashes, radius=6):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.radius = radius
+        n_blocks = radius + 1
+        bounds = [round(k * 64 / n_blocks) for k in range(n_blocks + 1)]
+        self.blocks = [
+            (np.uint64(lo), np.uint64((1 << (hi - lo)) - 1)) for lo, hi in zip(bounds, bounds[1:])
+        ]
+        self.tables = []
+        for shift, mask in self.blocks:
+            keys = (self.hashes >> shift) & mask
+            self.tables.append({int(keys[b[0]]): b for b in _buckets(keys, min_size=1)})
+
+    def query(self, h):
+        """Indices of the stored hashes within radius of h."""
+        h = np.uint64(h)
+        cands = [
+            table.get(int((h >> shift) & mask))
+            for (shift, mask), table in zip(self.blocks, self.tables)
+        ]
+        cands = [c for c in cands if c is not None]
+        if not cands:
+            return np.zeros(0, dtype=np.int64)
+        cands = np.unique(np.concatenate(cands))
+        return cands[hamming(self.hashes[cands], h) <= self.radius]
+
+    def links(self, dense_max=2048, chunk=512):
+        """
+        (i, j) index arrays of hash pairs within radius, enough to connect
+        every group of near-duplicates (not necessarily every pair). Within
+        a block bucket each member is linked to the smallest member of its
+        connected component, so a tight cluster costs k links, not k^2.
+        """
+        for table in self.tables:
+            for bucket in table.values():
+                k = bucket.size
+                if k < 2:
+                    continue
+                hb = self.hashes[bucket]
+                if k <= dense_max:
+                    adj = hamming(hb[:, None], hb[None, :]) <= self.radius
+                    labels = np.arange(k)
+                    while True:
+                        new = np.where(adj, labels[None, :], k).min(axis=1)
+                        new = new[new]
+                        if np.array_equal(new, labels):
+                            break
+                        labels = new
+                    moved = np.flatnonzero(labels != np.arange(k))
+                    if moved.size:
+                        yield bucket[labels[moved]], bucket[moved]
+                    continue
+                for lo in range(0, k, chunk):
+                    d = hamming(hb[lo:lo + chunk, None], hb[None, :])
+                    x, y = np.nonzero(d <= self.radius)
+                    keep = lo + x < y
+                    if keep.any():
+                        yield bucket[lo + x[keep]], bucket[y[keep]]
+
+
+def visual_duplicate_groups(hashes, radius=6):
+    """
+    hashes: one dHash (int) per doc, None for docs that are not images.
+    Docs whose hashes differ in at most `radius` bits are grouped.
+    Returns groups of doc indices (size >= 2).
+    """
+    ids = np.array([i for i, h in enumerate(hashes) if h is not None], dtype=np.int64)
+    if ids.size < 2:
+        return []
+    sets = _UnionFind(len(hashes))
+    union = sets.union
+
+    # equal hashes join directly; the index only sees each distinct hash once
+    values = np.array([hashes[i] for i in ids], dtype=np.uint64)
+    uniq, first, inv = np.unique(values, return_index=True, return_inverse=True)
+    inv = inv.ravel()
+    for k, u in enumerate(inv):
+        union(int(ids[first[u]]), int(ids[k]))
+
+    index = MultiIndexHash(uniq, radius)
+    for a, b in index.links():
+        for x, y in zip(ids[first[a]].tolist(), ids[first[b]].tolist()):
+            union(x, y)
+
+    return sets.groups(ids.tolist())
+
+
+# ------------------ Byte-exact duplicates ------------------
+def file_digest(path, limit=None, block_size=READ_BLOCK, stats=None):
+    """BLAKE2b-160 of the first `limit` bytes of a file (all of it when None), read in blocks."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        left = limit
+        while left is None or left > 0:
+            chunk = f.read(block_size if left is None else min(block_size, left))
+            if not chunk:
+                break
+            h.update(chunk)
+            if left is not None:
+                left -= len(chunk)
+            if stats is not None:
+                stats["bytes_read"] = stats.get("bytes_read", 0) + len(chunk)
+    return h.digest()
+
+
+def exact_duplicate_groups(files, digests=None, head_bytes=HEAD_BYTES, stats=None):
+    """
+    files: [(path, size)]; size None means "stat it".
+    digests: {index: full-file digest} already known (e.g. cached); the
+    digests computed here are added to it.
+    Files are bucketed by size, same-size files by a hash of their first
+    head_bytes, and only files still colliding are hashed in full, so
+    files with a unique size are never opened.
+    Returns groups of indices (size >= 2) with byte-identical contents.
+    """
+    digests = {} if digests is None else digests
+    stats = {} if stats is None else stats
+    stats.setdefault("bytes_read", 0)
+
+    by_size = {}
+    for i, (path, size) in enumerate(files):
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+        by_size.setdefault(int(size), []).append(i)
+    stats["bytes_total"] = sum(size * len(ids) for size, ids in by_size.items())
+
+    def read(i, limit=None):
+        try:
+            return file_digest(files[i][0], limit, stats=stats)
+        except OSError as e:
+            print(f"Read error ({files[i][0]}): {e}")
+            return None
+
+    groups = []
+    for size, ids in by_size.items():
+        if len(ids) < 2:
+            continue
+        if all(i in digests for i in ids):
+            buckets = [ids]  # everything known, nothing to read
+        elif size <= head_bytes:
+            buckets = [ids]  # the head is the whole file: one read each
+        else:
+            by_head = {}
+            for i in ids:
+                head = read(i, head_bytes)
+                if head is not None:
+                    by_head.setdefault(head, []).append(i)
+            buckets = [b for b in by_head.values() if len(b) >= 2]
+
+        by_full = {}
+        for bucket in buckets:
+            for i in bucket:
+                d = digests.get(i)
+                if d is None:
+                    d = read(i)
+                    if d is None:
+                        continue
+                    digests[i] = d
+                by_full.setdefault(d, []).append(i)
+        groups.extend(sorted(g) for g in by_full.values() if len(g) >= 2)
+    return sorted(groups, key=lambda g: g[0])
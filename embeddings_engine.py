@@ -60,7 +60,10 @@ class EmbeddingsEngine:
         norms[norms==0] = 1.0
         self.doc_embeddings = self.doc_embeddings / norms
 
-    def query(self, query_text, top_k=10):
+    def query(self, query_text, top_k=10, mask=None):
+        """
+        mask: optional bool array over doc IDs; only those rows are scored.
+        """
         if self.doc_embeddings is None:
             return []
         if self.model is None:
@@ -70,7 +73,12 @@ class EmbeddingsEngine:
         else:
             q_emb = self.model.encode([query_text], show_progress_bar=False)[0]
         q_emb = q_emb / (np.linalg.norm(q_emb) or 1.0)
-        sims = (self.doc_embeddings @ q_emb)
-        idx_sorted = np.argsort(sims)[::-1][:top_k]
-        results = [{"index": int(i), "score": float(sims[i])} for i in idx_sorted if sims[i] > 0]
+        if mask is None:
+            ids = np.arange(self.doc_embeddings.shape[0])
+            sims = self.doc_embeddings @ q_emb
+        else:
+            ids = np.flatnonzero(mask)
+            sims = self.doc_embeddings[ids] @ q_emb
+        order = np.argsort(sims)[::-1][:top_k]
+        results = [{"index": int(ids[j]), "score": float(sims[j])} for j in order if sims[j] > 0]
         return results
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+
+
+class FacetIndex:
+    """
+    Filter index over DATA positions (doc IDs), built once per load.
+    ext   -> bool bitmap per extension
+    tags  -> lowercased tag -> set of doc IDs
+    mtime / size -> sorted arrays, range filters use binary search
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.ext_bitmaps = {}
+        self.tag_postings = {}
+        self.doc_tags = []
+        self.mtime = np.zeros(0)
+        self.size = np.zeros(0, dtype=np.int64)
+        self.mtime_order = np.zeros(0, dtype=np.int64)
+        self.mtime_sorted = np.zeros(0)
+        self.untimed = np.zeros(0, dtype=bool)
+        self.size_order = np.zeros(0, dtype=np.int64)
+        self.size_sorted = np.zeros(0, dtype=np.int64)
+        self._ranks = {}
+
+    def build(self, data):
+        """
+        data: list of {"filename","modified_time","created_time","size_bytes","tags"}
+        """
+        n = len(data)
+        self.n = n
+        exts = []
+        mtime = np.full(n, np.nan)
+        size = np.zeros(n, dtype=np.int64)
+
+        for i, d in enumerate(data):
+            fn = (d.get("filename", "") or "").lower()
+            exts.append(os.path.splitext(fn)[1])
+
+            mt = d.get("modified_time") or d.get("created_time")
+            if isinstance(mt, (int, float)):
+                mtime[i] = mt
+
+            try:
+                sz = d.get("size_bytes")
+                size[i] = int(sz) if sz is not None else 0
+            except Exception:
+                size[i] = 0
+
+        ext_arr = np.array(exts, dtype=object)
+        self.ext_bitmaps = {e: ext_arr == e for e in set(exts)}
+
+        self.tag_postings = {}
+        self.doc_tags = [[] for _ in range(n)]
+        for i, d in enumerate(data):
+            self.set_tags(i, d.get("tags", []))
+
+        self.mtime = mtime
+        self.untimed = np.isnan(mtime)
+        timed = np.flatnonzero(~self.untimed)
+        self.mtime_order = timed[np.argsort(mtime[timed], kind="stable")]
+        self.mtime_sorted = mtime[self.mtime_order]
+
+        self.size = size
+        self.size_order = np.argsort(size, kind="stable")
+        self.size_sorted = size[self.size_order]
+        self._ranks = {}
+
+    def set_tags(self, doc_id, tags):
+        """Replace one doc's tag postings (called on load and on tag edits)."""
+        for t in self.doc_tags[doc_id]:
+            ids = self.tag_postings.get(t)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.tag_postings[t]
+        lowered = sorted(set(t.strip().lower() for t in (tags or []) if t and t.strip()))
+        for t in lowered:
+            self.tag_postings.setdefault(t, set()).add(doc_id)
+        self.doc_tags[doc_id] = lowered
+
+    def ext_mask(self, exts):
+        mask = np.zeros(self.n, dtype=bool)
+        for e in exts:
+            bm = self.ext_bitmaps.get(e.lower())
+            if bm is not None:
+                mask |= bm
+        return mask
+
+    def tag_mask(self, tag):
+        mask = np.zeros(self.n, dtype=bool)
+        ids = self.tag_postings.get((tag or "").strip().lower())
+        if ids:
+            mask[np.fromiter(ids, dtype=np.int64, count=len(ids))] = True
+        return mask
+
+    def mtime_mask(self, lo=-np.inf, hi=np.inf):
+        """Docs with lo <= mtime < hi; docs without a timestamp always pass."""
+        a = np.searchsorted(self.mtime_sorted, lo, side="left")
+        b = np.searchsorted(self.mtime_sorted, hi, side="left")
+        mask = self.untimed.copy()
+        mask[self.mtime_order[a:b]] = True
+        return mask
+
+    def size_mask(self, lo=0, hi=None):
+        """Docs with lo <= size_bytes < hi."""
+        a = np.searchsorted(self.size_sorted, lo, side="left")
+        b = self.n if hi is None else np.searchsorted(self.size_sorted, hi, side="left")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.size_order[a:b]] = True
+        return mask
+
+    def sorted_ids(self, key, mask=None, descending=False):
+        """
+        All doc IDs ordered by "date" or "size", restricted to mask.
+        Undated docs sort last either way.
+        """
+        if key == "date":
+            order = self.mtime_order[::-1] if descending else self.mtime_order
+            tail = np.flatnonzero(self.untimed)
+            order = np.concatenate([order, tail])
+        elif key == "size":
+            order = self.size_order[::-1] if descending else self.size_order
+        else:
+            order = np.arange(self.n)
+        if mask is not None:
+            order = order[mask[order]]
+        return order
+
+    def rank(self, key, descending=False):
+        """Position of every doc in sorted_ids(key) -> cheap sort of any subset."""
+        cache_key = (key, descending)
+        if cache_key not in self._ranks:
+            order = self.sorted_ids(key, descending=descending)
+            ranks = np.empty(self.n, dtype=np.int64)
+            ranks[order] = np.arange(order.size)
+            self._ranks[cache_key] = ranks
+        return self._ranks[cache_key]
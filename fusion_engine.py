@@ -0,0 +1,166 @@
+import numpy as np
+
+
+def to_arrays(results, score_key="score"):
+    """
+    results: list of dicts carrying "index" (doc ID) and a score,
+    or a dict doc ID -> score.
+    Returns (ids, scores) NumPy arrays; entries without a doc ID are dropped.
+    """
+    if isinstance(results, dict):
+        ids = np.fromiter((int(i) for i in results.keys()), dtype=np.int64, count=len(results))
+        scores = np.fromiter((float(v or 0.0) for v in results.values()), dtype=float, count=len(results))
+        return ids, scores
+
+    ids, scores = [], []
+    for it in results or []:
+        idx = it.get("index")
+        if idx is None:
+            continue
+        ids.append(int(idx))
+        try:
+            scores.append(float(it.get(score_key, 0.0) or 0.0))
+        except Exception:
+            scores.append(0.0)
+    return np.array(ids, dtype=np.int64), np.array(scores, dtype=float)
+
+
+def _stack(score_lists):
+    names = list(score_lists.keys())
+    parts = [score_lists[n] for n in names]
+    if not parts or all(len(ids) == 0 for ids, _ in parts):
+        return names, np.zeros(0, dtype=np.int64), None, None
+    all_ids = np.concatenate([ids for ids, _ in parts])
+    uniq, inv = np.unique(all_ids, return_inverse=True)
+
+    # components[c, j] = score of candidate c in list j (NaN = not returned)
+    components = np.full((uniq.size, len(names)), np.nan)
+    offset = 0
+    for j, (ids, scores) in enumerate(parts):
+        components[inv[offset:offset + len(ids)], j] = scores
+        offset += len(ids)
+    return names, uniq, components, inv
+
+
+def _finish(names, uniq, components, fused, top_k):
+    order = np.argsort(-fused, kind="stable")
+    if top_k is not None:
+        order = order[:top_k]
+    out = []
+    for c in order:
+        comps = {
+            names[j]: float(components[c, j])
+            for j in range(len(names))
+            if not np.isnan(components[c, j])
+        }
+        out.append({"index": int(uniq[c]), "score": float(fused[c]), "components": comps})
+    return out
+
+
+def weighted_sum(score_lists, weights=None, top_k=None):
+    """
+    score_lists: {name: (ids, scores)} with ids as doc IDs.
+    weights: {name: weight}, default 1.0.
+    Returns [{"index","score","components"}] sorted by fused score.
+    """
+    names, uniq, components, _ = _stack(score_lists)
+    if uniq.size == 0:
+        return []
+    w = np.array([(weights or {}).get(n, 1.0) for n in names])
+    fused = np.nansum(components * w, axis=1)
+    return _finish(names, uniq, components, fused, top_k)
+
+
+def reciprocal_rank(score_lists, k=60, weights=None, top_k=None):
+    """
+    Reciprocal-rank fusion: sum of w / (k + rank) over every list a doc
+    appears in. Only ranks matter, so backends need no score scaling.
+    """
+    names, uniq, components, _ = _stack(score_lists)
+    if uniq.size == 0:
+        return []
+    fused = np.zeros(uniq.size)
+    for j, n in enumerate(names):
+        col = components[:, j]
+        present = np.flatnonzero(~np.isnan(col))
+        order = present[np.argsort(-col[present], kind="stable")]
+        w = (weights or {}).get(n, 1.0)
+        fused[order] += w / (k + np.arange(1, order.size + 1))
+    return _finish(names, uniq, components, fused, top_k)
+
+
+def _fuzzy_by_index(fuzzy_list, data):
+    """
+    Fuzzy input of either shape as {doc ID: score}. The old shape keys
+    scores by filename (a dict filename -> score, or items carrying
+    "filename" but no "index"); those map to the first doc with that name,
+    as the old merge did, and unknown names are dropped.
+    """
+    first = None
+
+    def doc_id(key, filename):
+        nonlocal first
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        if first is None:
+            first = {}
+            for i, d in enumerate(data):
+                first.setdefault(d.get("filename"), i)
+        return first.get(filename)
+
+    if isinstance(fuzzy_list, dict):
+        pairs = ((doc_id(k, k), v) for k, v in fuzzy_list.items())
+    else:
+        pairs = (
+            (doc_id(it.get("index"), it.get("filename")), it.get("fuzzy_score"))
+            for it in fuzzy_list or []
+        )
+    out = {}
+    for i, v in pairs:
+        if i is not None:
+            out[i] = v
+    return out
+
+
+def merge_scores(fuzzy_list, tfidf_list, embed_list, data, weights=(0.3,0.3,0.4), top_k=10, method="weighted"):
+    """
+    fuzzy_list: list of {"index","fuzzy_score"} or dict doc ID -> score (0-100);
+                the old filename-keyed shapes are still accepted
+    tfidf_list: list of {"index","score"} referencing data indices
+    embed_list: list of {"index","score"}
+    data: original data list
+    weights: (w_fuzzy, w_tfidf, w_embed)
+    method: "weighted" or "rrf"
+    Returns top_k merged results with fields:
+    {"index","filename","path","text","score","components":{...}}
+    """
+    w_f, w_t, w_e = weights
+    f_ids, f_scores = to_arrays(_fuzzy_by_index(fuzzy_list, data))
+    lists = {
+        "fuzzy": (f_ids, f_scores / 100.0),
+        "tfidf": to_arrays(tfidf_list),
+        "embed": to_arrays(embed_list),
+    }
+    w = {"fuzzy": w_f, "tfidf": w_t, "embed": w_e}
+    if method == "rrf":
+        fused = reciprocal_rank(lists, weights=w, top_k=top_k)
+    else:
+        fused = weighted_sum(lists, weights=w, top_k=top_k)
+
+    results = []
+    for r in fused:
+        item = data[r["index"]]
+        comps = r["components"]
+        results.append({
+            "index": r["index"],
+            "filename": item["filename"],
+            "path": item["path"],
+            "text": item["text"],
+            "score": r["score"],
+            "components": {
+                "fuzzy": comps.get("fuzzy", 0.0) * 100.0,
+                "tfidf": comps.get("tfidf", 0.0),
+                "embed": comps.get("embed", 0.0),
+            },
+        })
+    return results
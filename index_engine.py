@@ -0,0 +1,546 @@
+import os
+import re
+from bisect import bisect_left
+import numpy as np
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def make_snippet(text, spans, width=320, windows=2, mark=("[", "]")):
+    """
+    Preview text around match spans [(start, end)] without scanning text:
+    up to `windows` slices of about `width` characters, each placed where
+    it covers the most spans, with the spans wrapped in `mark`. Without
+    spans this is the start of the text.
+    """
+    text = text or ""
+    spans = sorted((max(0, a), min(len(text), b)) for a, b in spans if b > a and a < len(text))
+    if not spans:
+        return " ".join(text[:width].split())
+
+    per = max(40, width // windows)
+    chosen = []
+    remaining = list(spans)
+    while remaining and len(chosen) < windows:
+        # window starting a little before each span; keep the one covering most spans
+        best, best_n = None, 0
+        for a, _ in remaining:
+            lo = max(0, a - per // 4)
+            n = sum(1 for s, e in remaining if s >= lo and e <= lo + per)
+            if n > best_n:
+                best, best_n = lo, n
+        if best is None:  # a span longer than the window
+            best = remaining[0][0]
+        hi = best + per
+        chosen.append((best, hi))
+        remaining = [(s, e) for s, e in remaining if e <= best or s >= hi]
+    chosen.sort()
+
+    parts, prev_hi = [], 0
+    for lo, hi in chosen:
+        lo, hi = max(lo, prev_hi), min(len(text), hi)
+        inside = [(s, e) for s, e in spans if s >= lo and e <= hi]
+        # snap the edges to word boundaries without cutting into a hit
+        if lo > 0:
+            cut = text.find(" ", lo, min(lo + 20, inside[0][0] if inside else hi))
+            lo = cut + 1 if cut >= 0 else lo
+        if hi < len(text):
+            cut = text.rfind(" ", max(hi - 20, inside[-1][1] if inside else lo), hi)
+            hi = cut if cut >= 0 else hi
+        piece, at = [], lo
+        for s, e in inside:
+            piece.append(text[at:s])
+            piece.append(mark[0] + text[s:e] + mark[1])
+            at = e
+        piece.append(text[at:hi])
+        parts.append(("… " if lo > prev_hi or (lo > 0 and not parts) else "") + " ".join("".join(piece).split()))
+        prev_hi = hi
+    return " ".join(parts)
+
+
+class PositionalIndex:
+    """
+    Positional inverted index over DATA positions (doc IDs).
+    Postings are packed into flat arrays:
+      term -> tid                                   tids follow sorted term order
+      post_docs[term_start[tid]:term_start[tid+1]]  sorted doc IDs
+      positions[pos_start[k]:pos_start[k+1]]        token positions of posting k
+      ws_gap (aligned with positions)               only whitespace before next token
+      offsets (aligned with positions)              character offset of the token
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.vocab = {}
+        self.terms = []
+        self.term_start = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.pos_start = np.zeros(1, dtype=np.int64)
+        self.positions = np.zeros(0, dtype=np.int32)
+        self.ws_gap = np.zeros(0, dtype=bool)
+        self.offsets = np.zeros(0, dtype=np.int32)
+
+    def build(self, data):
+        """
+        data: list of {"text"}; tokens are lowercased \\w+ runs.
+        """
+        postings = {}
+        for doc_id, item in enumerate(data):
+            text = (item.get("text", "") or "").lower()
+            spans = [(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+            for pos, (tok, start, end) in enumerate(spans):
+                ws = pos + 1 < len(spans) and text[end:spans[pos + 1][1]].isspace()
+                docs = postings.get(tok)
+                if docs is None:
+                    docs = postings[tok] = {}
+                plist = docs.get(doc_id)
+                if plist is None:
+                    docs[doc_id] = [(pos, ws, start)]
+                else:
+                    plist.append((pos, ws, start))
+
+        vocab = {}
+        term_start = [0]
+        post_docs = []
+        pos_start = [0]
+        positions = []
+        ws_gap = []
+        offsets = []
+        # sorted tids make every term prefix one contiguous range of postings
+        for tid, (tok, docs) in enumerate(sorted(postings.items())):
+            vocab[tok] = tid
+            for doc_id in sorted(docs):
+                for pos, ws, start in docs[doc_id]:
+                    positions.append(pos)
+                    ws_gap.append(ws)
+                    offsets.append(start)
+                post_docs.append(doc_id)
+                pos_start.append(len(positions))
+            term_start.append(len(post_docs))
+
+        self.n = len(data)
+        self.vocab = vocab
+        self.terms = sorted(vocab)
+        self.term_start = np.array(term_start, dtype=np.int64)
+        self.post_docs = np.array(post_docs, dtype=np.int32)
+        self.pos_start = np.array(pos_start, dtype=np.int64)
+        self.positions = np.array(positions, dtype=np.int32)
+        self.ws_gap = np.array(ws_gap, dtype=bool)
+        self.offsets = np.array(offsets, dtype=np.int32)
+
+    def _postings(self, term):
+        tid = self.vocab.get(term)
+        if tid is None:
+            return None
+        a, b = self.term_start[tid], self.term_start[tid + 1]
+        return np.arange(a, b), self.post_docs[a:b]
+
+    def prefix_range(self, prefix):
+        """tids [lo, hi) of the terms starting with prefix."""
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\uffff")
+        return lo, hi
+
+    def expand(self, prefix, limit=8):
+        """Terms starting with prefix, most widespread first."""
+        lo, hi = self.prefix_range(prefix)
+        if lo == hi:
+            return []
+        df = np.diff(self.term_start[lo:hi + 1])
+        top = np.argsort(-df, kind="stable")[:limit]
+        return [self.terms[lo + j] for j in top]
+
+    def term_docs(self, term, prefix=False):
+        """Bool mask of docs containing term (or any term starting with it)."""
+        mask = np.zeros(self.n, dtype=bool)
+        if prefix:
+            lo, hi = self.prefix_range(term)
+        else:
+            lo = self.vocab.get(term)
+            if lo is None:
+                return mask
+            hi = lo + 1
+        mask[self.post_docs[self.term_start[lo]:self.term_start[hi]]] = True
+        return mask
+
+    def _pos(self, k):
+        a, b = self.pos_start[k], self.pos_start[k + 1]
+        return self.positions[a:b], self.ws_gap[a:b]
+
+    def _slot(self, term, doc_id):
+        """Posting index of (term, doc_id), or None."""
+        tid = self.vocab.get(term)
+        if tid is None:
+            return None
+        a, b = self.term_start[tid], self.term_start[tid + 1]
+        k = a + np.searchsorted(self.post_docs[a:b], doc_id)
+        if k >= b or self.post_docs[k] != doc_id:
+            return None
+        return int(k)
+
+    def phrase_spans(self, doc_id, terms, starts, limit=20):
+        """Character spans of the phrase hits at token positions `starts`."""
+        first, last = self._slot(terms[0], doc_id), self._slot(terms[-1], doc_id)
+        if first is None or last is None:
+            return []
+        out = []
+        for p in list(starts)[:limit]:
+            pos, _ = self._pos(first)
+            a = self.pos_start[first] + np.searchsorted(pos, p)
+            pos, _ = self._pos(last)
+            b = self.pos_start[last] + np.searchsorted(pos, p + len(terms) - 1)
+            out.append((int(self.offsets[a]), int(self.offsets[b]) + len(terms[-1])))
+        return out
+
+    def term_spans(self, doc_id, terms, limit=20):
+        """Character spans of every occurrence of `terms` in a doc, in text order."""
+        out = []
+        for t in dict.fromkeys(terms):
+            k = self._slot(t, doc_id)
+            if k is None:
+                continue
+            a, b = self.pos_start[k], self.pos_start[k + 1]
+            out.extend((int(o), int(o) + len(t)) for o in self.offsets[a:min(b, a + limit)])
+        out.sort()
+        return out[:limit]
+
+    def phrase(self, terms, mask=None, ws_only=True):
+        """
+        Docs containing `terms` as consecutive tokens (separated only by
+        whitespace when ws_only). Returns {doc_id: phrase start positions}.
+        """
+        if not terms:
+            return {}
+        lists = []
+        for t in terms:
+            p = self._postings(t)
+            if p is None:
+                return {}
+            lists.append(p)
+
+        # intersect doc lists, rarest term first
+        order = sorted(range(len(terms)), key=lambda j: lists[j][1].size)
+        docs = lists[order[0]][1]
+        if mask is not None:
+            docs = docs[mask[docs]]
+        for j in order[1:]:
+            docs = np.intersect1d(docs, lists[j][1], assume_unique=True)
+            if docs.size == 0:
+                return {}
+
+        # posting slot of every candidate doc, per term
+        slots = [
+            lists[j][0][np.searchsorted(lists[j][1], docs)] for j in range(len(terms))
+        ]
+
+        last = len(terms) - 1
+        hits = {}
+        for c, doc_id in enumerate(docs):
+            starts, ws = self._pos(slots[0][c])
+            if last and ws_only:
+                starts = starts[ws]
+            for j in range(1, len(terms)):
+                if starts.size == 0:
+                    break
+                pos, ws = self._pos(slots[j][c])
+                at = np.minimum(np.searchsorted(pos, starts + j), pos.size - 1)
+                ok = pos[at] == starts + j
+                if ws_only and j < last:
+                    ok &= ws[at]
+                starts = starts[ok]
+            if starts.size:
+                hits[int(doc_id)] = starts
+        return hits
+
+    def search(self, query, data=None, mask=None):
+        """
+        Exact word / phrase match, same semantics as a \\bquery\\b regex over
+        the lowercased text. Queries with punctuation are verified against
+        the candidate texts only.
+        Returns {doc_id: start positions}, or None if the query has no tokens.
+        """
+        q = re.sub(r"\s+", " ", (query or "").lower().strip())
+        terms = tokenize(q)
+        if not terms:
+            return None
+        plain = q == " ".join(terms)
+        hits = self.phrase(terms, mask, ws_only=plain)
+        if data is not None and not plain:
+            pattern = re.compile(r"\b" + re.escape(q) + r"\b")
+            hits = {
+                i: p
+                for i, p in hits.items()
+                if pattern.search(re.sub(r"\s+", " ", (data[i].get("text") or "").lower()))
+            }
+        return hits
+
+
+def char_ngrams(text, n=3):
+    text = " ".join((text or "").split())
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """
+    Character n-gram index over DATA positions (doc IDs).
+    Used to narrow the corpus before an expensive per-doc scorer:
+    only docs sharing enough n-grams with the query are returned.
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.num_docs = 0
+        self.vocab = {}
+        self.gram_start = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+
+    def build(self, texts):
+        """
+        texts: one string per doc ID (already cleaned / lowercased by caller).
+        """
+        vocab = {}
+        gids = []
+        counts = []
+        for text in texts:
+            grams = char_ngrams(text, self.n)
+            counts.append(len(grams))
+            for g in grams:
+                gid = vocab.get(g)
+                if gid is None:
+                    gid = vocab[g] = len(vocab)
+                gids.append(gid)
+
+        gids = np.array(gids, dtype=np.int64)
+        docs = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        order = np.argsort(gids, kind="stable")
+
+        self.num_docs = len(counts)
+        self.vocab = vocab
+        self.post_docs = docs[order]
+        self.gram_start = np.concatenate(
+            [[0], np.cumsum(np.bincount(gids, minlength=len(vocab)))]
+        ).astype(np.int64)
+
+    def docs_with(self, gram):
+        gid = self.vocab.get(gram)
+        if gid is None:
+            return self.post_docs[:0]
+        return self.post_docs[self.gram_start[gid]:self.gram_start[gid + 1]]
+
+    def candidates(self, query_text, mask=None, min_share=0.3, limit=500, min_score=None):
+        """
+        Doc IDs sharing at least `min_share` of the query's n-grams,
+        best `limit` by shared count. None when the query is too short
+        to prune (caller should score everything in mask).
+        min_score: keep instead every doc that can still reach this
+        partial_ratio. One indel edit destroys at most n of the query's
+        n-grams and a ratio of min_score allows 2 * len(query) *
+        (1 - min_score / 100) edits, so fewer shared grams rule a doc out.
+        """
+        grams = char_ngrams(query_text, self.n)
+        if not grams:
+            return None
+        postings = [self.docs_with(g) for g in grams]
+        counts = np.bincount(np.concatenate(postings), minlength=self.num_docs)
+        if mask is not None:
+            counts = np.where(mask, counts, 0)
+
+        if min_score is None:
+            need = int(np.ceil(min_share * len(grams)))
+        else:
+            edits = int(2 * len(" ".join(query_text.split())) * (1 - min_score / 100.0))
+            need = len(grams) - self.n * edits
+        ids = np.flatnonzero(counts >= max(1, need))
+        if ids.size > limit:
+            ids = ids[np.argpartition(counts[ids], -limit)[-limit:]]
+        return np.sort(ids)
+
+    def literal_docs(self, literal):
+        """Doc IDs containing every n-gram of `literal` (superset of docs containing it)."""
+        grams = sorted(char_ngrams(literal, self.n), key=lambda g: self.docs_with(g).size)
+        docs = None
+        for g in grams:
+            d = self.docs_with(g)
+            docs = d if docs is None else np.intersect1d(docs, d, assume_unique=True)
+            if docs.size == 0:
+                break
+        return docs
+
+    def clause_candidates(self, clauses, mask=None):
+        """
+        clauses: list of sets of literals (AND of ORs), see regex_literals().
+        Returns candidate doc IDs, or None when nothing can be pruned.
+        """
+        if not clauses:
+            return None
+        docs = None
+        for clause in clauses:
+            union = np.unique(np.concatenate([self.literal_docs(lit) for lit in clause]))
+            docs = union if docs is None else np.intersect1d(docs, union, assume_unique=True)
+            if docs.size == 0:
+                break
+        if mask is not None:
+            docs = docs[mask[docs]]
+        return docs
+
+
+_REPEATS = tuple(
+    getattr(sre_parse, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, name)
+)
+
+
+def _required_clauses(parsed, min_len):
+    clauses = []
+    run = []
+
+    def flush():
+        if len(run) >= min_len:
+            clauses.append({"".join(run)})
+        run.clear()
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL and not chr(av).isspace():
+            run.append(chr(av).lower())
+            continue
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            clauses.extend(_required_clauses(av[-1], min_len))
+        elif op in _REPEATS and av[0] >= 1:
+            clauses.extend(_required_clauses(av[2], min_len))
+        elif op is sre_parse.BRANCH:
+            alts = set()
+            for branch in av[1]:
+                sub = _required_clauses(branch, min_len)
+                if not sub:
+                    alts = None
+                    break
+                # any clause of a branch is implied by it; keep the most selective
+                alts |= max(sub, key=lambda c: min(len(lit) for lit in c))
+            if alts:
+                clauses.append(alts)
+    flush()
+    return clauses
+
+
+def regex_literals(pattern, min_len=3):
+    """
+    Literal strings any match of `pattern` must contain, as an AND of ORs:
+    [{"inv-"}, {"paid", "due"}] means contains "inv-" and ("paid" or "due").
+    Literals are lowercased and never contain whitespace; [] means no
+    usable literal (caller has to scan).
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return []
+    return _required_clauses(parsed, min_len)
+
+
+class FilenameIndex:
+    """
+    Filename / path lookup over DATA positions (doc IDs).
+    name_keys: sorted full names (lowercased, no extension)
+    word_keys: sorted words of the name plus folder names on the path
+    Both are searched trie-style with bisect; an NgramIndex over the
+    names serves substring and fuzzy lookups.
+    """
+
+    SCORES = {"exact": 100.0, "prefix": 90.0, "contains": 80.0, "word": 75.0, "path": 60.0}
+
+    def __init__(self):
+        self.names = []
+        self.name_keys = []
+        self.name_docs = np.zeros(0, dtype=np.int32)
+        self.word_keys = []
+        self.word_docs = np.zeros(0, dtype=np.int32)
+        self.word_kinds = []
+        self.grams = NgramIndex(n=3)
+
+    @property
+    def num_docs(self):
+        return len(self.names)
+
+    def build(self, data):
+        """
+        data: list of {"filename","path"}
+        """
+        names = []
+        words = []
+        for doc_id, d in enumerate(data):
+            name = os.path.splitext((d.get("filename", "") or "").lower())[0]
+            names.append(name)
+            for w in set(tokenize(name)):
+                words.append((w, doc_id, "word"))
+            folder = os.path.dirname((d.get("path", "") or "").replace("\\", "/")).lower()
+            for seg in set(s for s in folder.split("/") if s):
+                words.append((seg, doc_id, "path"))
+
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self.names = names
+        self.name_keys = [names[i] for i in order]
+        self.name_docs = np.array(order, dtype=np.int32)
+
+        words.sort()
+        self.word_keys = [w for w, _, _ in words]
+        self.word_docs = np.array([i for _, i, _ in words], dtype=np.int32)
+        self.word_kinds = [k for _, _, k in words]
+        self.grams.build(names)
+
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + "\uffff")
+
+    def search(self, query, mask=None, scorer=None, limit=50, min_fuzzy=70):
+        """
+        Returns {doc_id: (score, kind)} with kind in exact / prefix /
+        contains / word / path / fuzzy. scorer(query, name) -> 0..100 is
+        only run on trigram candidates.
+        """
+        q = " ".join((query or "").lower().split())
+        if not q:
+            return {}
+        hits = {}
+
+        def add(doc_id, kind, score=None):
+            doc_id = int(doc_id)
+            if mask is not None and not mask[doc_id]:
+                return
+            score = self.SCORES[kind] if score is None else score
+            if doc_id not in hits or hits[doc_id][0] < score:
+                hits[doc_id] = (score, kind)
+
+        a, b = self._prefix_range(self.name_keys, q)
+        for k in range(a, b):
+            add(self.name_docs[k], "exact" if self.name_keys[k] == q else "prefix")
+
+        a, b = self._prefix_range(self.word_keys, q)
+        for k in range(a, b):
+            add(self.word_docs[k], self.word_kinds[k])
+
+        if len(q) >= self.grams.n:
+            docs = self.grams.literal_docs(q)
+            for doc_id in docs if docs is not None else ():
+                if q in self.names[doc_id]:
+                    add(doc_id, "contains")
+
+            if scorer is not None:
+                for doc_id in self.grams.candidates(q, mask, limit=limit * 4):
+                    sc = float(scorer(q, self.names[doc_id]))
+                    if sc >= min_fuzzy:
+                        add(doc_id, "fuzzy", 0.6 * sc)
+
+        if len(hits) > limit:
+            best = sorted(hits.items(), key=lambda kv: kv[1][0], reverse=True)[:limit]
+            hits = dict(best)
+        return hits
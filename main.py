@@ -12,16 +12,33 @@ import re
 import traceback
 import time
 import subprocess
+import atexit
+import hashlib
+import struct
+import heapq
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
+import numpy as np
 import customtkinter as ctk
 from PIL import Image, ImageTk
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import messagebox
 
 from ocr_engine import extract_text_from_folder
-from nlp_engine import apply_feedback, clean_text
+import nlp_engine
+from nlp_engine import apply_feedback, clean_text, feedback_scores
 from ml_engine import TFIDFEngine
-from storage_engine import save_data_json, load_data_json
+from facet_engine import FacetIndex
+from fusion_engine import weighted_sum, to_arrays
+from index_engine import PositionalIndex, NgramIndex, FilenameIndex, regex_literals, tokenize, make_snippet
+from storage_engine import SQLiteStore, TagJournal, ColumnStore, RecentSearches
+from cache_engine import ResultCache
+from thumbnail_engine import ThumbnailCache, TiledImage, decode_thumbnail
+from duplicate_engine import (
+    MinHasher, find_duplicate_groups, visual_duplicate_groups, exact_duplicate_groups,
+    dhash_file, DHASH_KIND, DIGEST_KIND,
+)
 
 # ------------------ Fuzzy helper (rapidfuzz or difflib) ------------------
 try:
@@ -42,12 +59,19 @@ except Exception:
 # ------------------ Constants & Globals ------------------
 DATA = []
 filtered_data = []
+# bool mask over DATA positions (doc IDs) produced by the filter step
+filtered_mask = None
+last_results = []
+last_query = ""
 
 DATA_FOLDER = "data_storage"
 LAST_USED_FILE = os.path.join(DATA_FOLDER, "last_used_folder.json")
 USED_FOLDERS_FILE = os.path.join(DATA_FOLDER, "used_folders.json")
-RECENT_SEARCHES_FILE = os.path.join(DATA_FOLDER, "recent_searches.json")
 USERS_FILE = os.path.join(DATA_FOLDER, "users.json")  # for login/register
+DB_FILE = os.path.join(DATA_FOLDER, "smartshot.db")
+TAGS_JOURNAL_FILE = os.path.join(DATA_FOLDER, "tags.journal")
+COLUMNS_FOLDER = os.path.join(DATA_FOLDER, "columns")
+THUMBS_FOLDER = os.path.join(DATA_FOLDER, "thumbs")
 
 EXT_OPTIONS = ["All", "Images", ".pdf", ".docx", ".txt"]
 DATE_FILTER_OPTIONS = [
@@ -63,19 +87,85 @@ SIZE_FILTER_OPTIONS = [
     "1–10 MB",
     "> 10 MB",
 ]
+SORT_OPTIONS = [
+    "Relevance",
+    "Newest first",
+    "Oldest first",
+    "Largest first",
+    "Smallest first",
+]
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+RESULT_LIMIT = 200  # results kept per search, scrolled through PAGE_SIZE cards
+PAGE_SIZE = 10
+CARD_HEIGHT = 260  # fixed, so the virtual list can map scroll offsets to rows
+CARD_PAD = 8
+CARD_TEXT_WIDTH = 550  # wraplength of the card's text rows
+CARD_BODY_LINES = 3  # preview lines that fit under the card's one-line rows
+PREVIEW_SIZE = (820, 460)
+TALL_PREVIEW_RATIO = 3.0  # height / width beyond which image previews scroll in tiles
+TEXT_CHUNK_CHARS = 32 * 1024  # text previews are loaded this many characters at a time
+TEXT_WINDOW_CHUNKS = 4  # chunks held by a text preview at once
 
 tfidf_engine = TFIDFEngine()
+store = None
+tag_journal = None
+column_store = None  # mmap-backed texts / metadata of the loaded folder
+loaded_folder = None  # folder DATA was loaded from (its root in the store)
+recent_searches = None  # in-memory recent queries, flushed to the store behind
+# normalized path -> DATA position, rebuilt with the search indexes
+path_index = {}
+db_id_index = {}  # store row id -> DATA position
+index_generation = 0  # bumped whenever indexes or tags change
+search_generation = 0  # bumped per submitted search; older ones are stale
+_search_pending = None
+_search_cond = threading.Condition()
+_search_worker = None
+
+# search-as-you-type
+TYPEAHEAD_DEBOUNCE_MS = 150
+TYPEAHEAD_IGNORED_KEYS = {
+    "Left", "Right", "Up", "Down", "Home", "End", "Tab", "Escape",
+    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R",
+}
+_typeahead_after = None
+_last_full_search = None  # (query, generation) of the last full search submitted
+_typeahead_state = None  # (query, (mask key, index generation), candidate doc IDs)
+
+# per-backend latency budget in seconds, measured from the start of a search
+FUZZY_TOP_N = 50  # fuzzy hits handed to fusion; it only boosts, RESULT_LIMIT is for the list
+FUZZY_CANDIDATES = 400  # docs partial_ratio runs on per query
+FUZZY_MIN_SCORE = 60
+BACKEND_DEADLINES = {"filename": 0.5, "fuzzy": 1.5, "tfidf": 1.0, "overlap": 1.0, "fts": 1.0, "regex": 5.0}
+backend_pool = ThreadPoolExecutor(max_workers=5, thread_name_prefix="search-backend")
+result_cache = ResultCache(maxsize=32)
+thumbs = ThumbnailCache(THUMBS_FOLDER, size=(220, 150))
+minhasher = MinHasher()
+VISUAL_DUP_RADIUS = 6  # dHash bits (of 64) two near-identical images may differ in
+duplicate_mode = "Text"
+facet_index = FacetIndex()
+phrase_index = PositionalIndex()
+fuzzy_index = NgramIndex(n=3)
+regex_index = NgramIndex(n=3)
+filename_index = FilenameIndex()
 
 root = None
 folder_entry = None
 search_entry = None
 result_frame = None
+_result_view = {"results": [], "query": "", "first": 0, "gen": None}
+_result_view_frame = None
+_card_pool = []
+_empty_label = None
+_spacers = None
+_measure_fonts = {}  # CTk font tuple -> tkfont.Font, for clamp_text
 folder_dropdown = None
 ext_dropdown = None
 date_filter_dropdown = None
 size_filter_dropdown = None
 recent_dropdown = None
 tag_filter_dropdown = None
+sort_dropdown = None
+regex_mode_var = None
 
 progress_label = None
 progress_var = None
@@ -171,9 +261,32 @@ def authenticate_user(username: str, password: str) -> bool:
 
 
 # ------------------ Folder JSON helpers ------------------
-def get_folder_json_path(folder_path):
-    folder_name = os.path.basename(os.path.normpath(folder_path)) or "root"
-    return os.path.join(DATA_FOLDER, f"{folder_name}.json")
+def get_store():
+    """Open the SQLite store once; old JSON caches are imported on first use."""
+    global store, tag_journal, recent_searches
+    if store is None:
+        store = SQLiteStore(DB_FILE)
+        try:
+            n = store.import_legacy_json(DATA_FOLDER, load_used_folders())
+            if n:
+                print(f"Imported {n} legacy folder cache(s) into {DB_FILE}")
+        except Exception as e:
+            print("Legacy JSON import error:", e)
+        tag_journal = TagJournal(TAGS_JOURNAL_FILE, store.set_tags_many)
+        try:
+            # edits journaled before a crash / quit land before anything loads
+            tag_journal.compact()
+        except Exception as e:
+            print("Tag journal replay error:", e)
+        try:
+            feedback_scores.update(store.load_feedback())
+            # nlp_engine.record_feedback writes through to the feedback table
+            nlp_engine.feedback_store = store
+        except Exception as e:
+            print("Error loading feedback:", e)
+        recent_searches = RecentSearches(store)
+        atexit.register(recent_searches.flush)
+    return store
 
 
 def load_last_used_folder():
@@ -214,37 +327,13 @@ def save_used_folder(folder_path):
 
 
 # ------------------ Recent searches + cached results ------------------
-def _load_recent_data():
-    if not os.path.exists(RECENT_SEARCHES_FILE):
-        return {"recent": [], "cache": {}}
+def load_recent_searches():
     try:
-        with open(RECENT_SEARCHES_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, dict):
-            return {"recent": [], "cache": {}}
-        if "recent" not in data:
-            data["recent"] = []
-        if "cache" not in data:
-            data["cache"] = {}
-        return data
+        get_store()
+        return recent_searches.queries()
     except Exception as e:
         print("Error reading recent_searches:", e)
-        return {"recent": [], "cache": {}}
-
-
-def _save_recent_data(data):
-    try:
-        os.makedirs(DATA_FOLDER, exist_ok=True)
-        with open(RECENT_SEARCHES_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print("Error writing recent_searches:", e)
-
-
-def load_recent_searches():
-    data = _load_recent_data()
-    recent_list = data.get("recent", [])
-    return [r.get("query", "") for r in recent_list if r.get("query")]
+        return []
 
 
 def save_recent_search_with_results(
@@ -254,55 +343,53 @@ def save_recent_search_with_results(
     if not query:
         return
 
-    data = _load_recent_data()
-    recent_list = data.get("recent", [])
-    cache = data.get("cache", {})
-
-    recent_list = [
-        r for r in recent_list if r.get("query", "").lower() != query.lower()
-    ]
-    recent_list.insert(0, {"query": query, "time": time.time()})
-
-    if len(recent_list) > max_items:
-        for r in recent_list[max_items:]:
-            q = r.get("query")
-            if q in cache:
-                cache.pop(q, None)
-        recent_list = recent_list[:max_items]
-
-    cached_results = []
-    for item in (results[:max_results_per_query] if results else []):
-        cached_results.append(
-            {
-                "filename": item.get("filename", ""),
-                "path": item.get("path", ""),
-                "text": item.get("text", ""),
-                "score": float(item.get("score", 0.0)),
-                "fuzzy_score": float(item.get("fuzzy_score", 0.0)),
-                "tfidf_score": float(item.get("tfidf_score", 0.0)),
-                "embed_score": float(item.get("embed_score", 0.0)),
-                "match_info": item.get("match_info", "Fuzzy / semantic match"),
-                "tags": item.get("tags", []),
-            }
-        )
-
-    cache[query] = cached_results
-    data["recent"] = recent_list
-    data["cache"] = cache
-    _save_recent_data(data)
+    try:
+        get_store()
+        refs = []
+        for item in (results or [])[:max_results_per_query]:
+            ref = dict(item)
+            idx = ref.get("index")
+            if ref.get("db_id") is None and isinstance(idx, int) and 0 <= idx < len(DATA):
+                ref["db_id"] = DATA[idx].get("db_id")
+            refs.append(ref)
+        recent_searches.max_items = max_items
+        recent_searches.add(query, refs)
+    except Exception as e:
+        print("Error writing recent_searches:", e)
     refresh_recent_dropdown()
 
 
 def load_recent_results_for_query(query):
+    """Recent results resolved against the loaded docs (fresh text / tags)."""
     query = (query or "").strip()
     if not query:
         return []
-    data = _load_recent_data()
-    cache = data.get("cache", {})
-    results = cache.get(query, []) or []
-    for r in results:
+    try:
+        get_store()
+        refs = recent_searches.results(query)
+    except Exception as e:
+        print("Error reading recent_searches:", e)
+        return []
+
+    results = []
+    for r in refs:
+        pos = db_id_index.get(r.get("db_id"))
+        if pos is None:
+            pos = path_index.get(os.path.normpath(r.get("path", "") or ""))
+        if pos is not None:
+            item = DATA[pos]
+            r.update(
+                index=pos,
+                filename=item.get("filename", ""),
+                path=item.get("path", ""),
+                text=item.get("text", ""),
+                tags=item.get("tags", []),
+            )
+        r.setdefault("text", "")
+        r.setdefault("match_info", "Fuzzy / semantic match")
         if "tags" not in r or not isinstance(r["tags"], list):
             r["tags"] = []
+        results.append(r)
     return results
 
 
@@ -326,12 +413,32 @@ def refresh_recent_dropdown():
 
 
 # ------------------ TF-IDF fit ------------------
-def fit_tfidf_engine():
+def open_root_documents(db, folder):
+    """
+    Records of a stored folder as LazyDocs over an mmap column store.
+    The column files are derived from SQLite and rebuilt whenever the
+    root's rows change; texts stay on disk until a doc is read.
+    """
+    count, root_id, generation = db.root_signature(folder)
+    prefix = f"root{root_id}-"
+    name = f"{prefix}g{generation}"
+    directory = os.path.join(COLUMNS_FOLDER, name)
+    if not ColumnStore.is_valid(directory, count):
+        ColumnStore.write(directory, db.iter_root(folder))
+    cols = ColumnStore(directory)
+    try:
+        ColumnStore.remove_stale(COLUMNS_FOLDER, prefix, name)
+    except Exception:
+        pass
+    return cols, cols.docs(db.load_root_tags(folder))
+
+
+def fit_tfidf_engine(texts=None):
     if not DATA:
         return
     try:
         try:
-            tfidf_engine.fit(DATA)
+            tfidf_engine.fit(DATA, texts=texts)
         except Exception:
             tfidf_engine.fit([d.get("text", "") for d in DATA])
         print(f"TF-IDF fitted on {len(DATA)} docs.")
@@ -341,6 +448,43 @@ def fit_tfidf_engine():
         show_notification("⚠ TF-IDF index update failed", "orange")
 
 
+# ------------------ Search indexes (built once per load) ------------------
+def bump_index_generation():
+    """Invalidate cached search results (re-index, tag edits)."""
+    global index_generation
+    index_generation += 1
+
+
+def build_search_indexes():
+    bump_index_generation()
+    path_index.clear()
+    path_index.update(
+        (os.path.normpath(d.get("path", "") or ""), i) for i, d in enumerate(DATA)
+    )
+    db_id_index.clear()
+    db_id_index.update((d["db_id"], i) for i, d in enumerate(DATA) if d.get("db_id") is not None)
+    facet_index.build(DATA)
+    try:
+        phrase_index.build(DATA)
+    except Exception as e:
+        print("Phrase index build error:", e)
+    # texts may live on disk (LazyDoc); read each one once for every index
+    cleaned = None
+    try:
+        raw = [d.get("text", "") or "" for d in DATA]
+        cleaned = [clean_text(t) for t in raw]
+        fuzzy_index.build(cleaned)
+        regex_index.build([t.lower() for t in raw])
+        del raw
+    except Exception as e:
+        print("Trigram index build error:", e)
+    try:
+        filename_index.build(DATA)
+    except Exception as e:
+        print("Filename index build error:", e)
+    fit_tfidf_engine(cleaned)
+
+
 # ------------------ Popup Notifications ------------------
 def show_notification(text, color="white"):
     global root
@@ -385,10 +529,13 @@ def show_notification(text, color="white"):
 
 # ------------------ File & image helpers ------------------
 def get_thumbnail_image(path, size=(220, 150)):
+    """Blocking thumbnail (memory / disk cache first); must run on the UI thread."""
     try:
-        img = Image.open(path)
-        img.thumbnail(size)
-        return ImageTk.PhotoImage(img)
+        if tuple(size) == thumbs.size:
+            img = thumbs.load(path)
+        else:
+            img = decode_thumbnail(path, size)
+        return ImageTk.PhotoImage(img) if img is not None else None
     except Exception:
         return None
 
@@ -479,49 +626,25 @@ def refresh_tag_filter_dropdown():
 
 
 def propagate_tags_to_data(path, tags):
-    normalized_path = os.path.normpath(path or "")
-    for d in DATA:
-        p = os.path.normpath(d.get("path", "") or "")
-        if p == normalized_path:
-            d["tags"] = list(sorted(set(tags)))
-    for d in filtered_data:
-        p = os.path.normpath(d.get("path", "") or "")
-        if p == normalized_path:
-            d["tags"] = list(sorted(set(tags)))
+    # filtered_data holds the same dicts as DATA, so one update covers both
+    i = path_index.get(os.path.normpath(path or ""))
+    if i is None or i >= len(DATA):
+        return
+    DATA[i]["tags"] = list(sorted(set(tags)))
+    if i < facet_index.n:
+        facet_index.set_tags(i, DATA[i]["tags"])
+    bump_index_generation()
 
 
-def save_tags_to_folder_json(path, tags):
-    path = path or ""
+def save_tags_to_store(path, tags):
+    """Journal the edit; the store is updated by background compaction."""
     if not path:
         return
-    folder = os.path.dirname(path)
-    if not folder:
-        return
-
-    json_path = get_folder_json_path(folder)
-    if not os.path.exists(json_path):
-        return
-
     try:
-        data_list = load_data_json(json_path)
+        get_store()
+        tag_journal.append(path, list(sorted(set(tags))))
     except Exception as e:
-        print("Error loading folder json for tags:", e)
-        return
-
-    changed = False
-    norm_target = os.path.normpath(path)
-    for item in data_list:
-        p = os.path.normpath(item.get("path", "") or "")
-        if p == norm_target:
-            item["tags"] = list(sorted(set(tags)))
-            changed = True
-            break
-
-    if changed:
-        try:
-            save_data_json(data_list, json_path)
-        except Exception as e:
-            print("Error saving folder json with tags:", e)
+        print("Error saving tags:", e)
 
 
 def open_tag_manager(item):
@@ -644,7 +767,7 @@ def open_tag_manager(item):
 
         item["tags"] = selected_list
         propagate_tags_to_data(path, selected_list)
-        save_tags_to_folder_json(path, selected_list)
+        save_tags_to_store(path, selected_list)
 
         refresh_tag_filter_dropdown()
         display_results(filtered_data if filtered_data else DATA, search_entry.get())
@@ -667,10 +790,11 @@ def open_tag_manager(item):
 
 # ------------------ Filtering (ext + date + size + tags) ------------------
 def update_filtered_data():
-    global filtered_data
+    global filtered_data, filtered_mask
 
     if not DATA:
         filtered_data = []
+        filtered_mask = None
         return
 
     try:
@@ -699,83 +823,42 @@ def update_filtered_data():
     except Exception:
         selected_tag = "All tags"
 
-    if selected_ext == "All":
-        temp = list(DATA)
-    elif selected_ext == "Images":
-        img_exts = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
-        temp = [
-            d
-            for d in DATA
-            if (d.get("filename", "") or "").lower().endswith(img_exts)
-        ]
-    else:
-        ext = selected_ext.lower()
-        temp = [
-            d
-            for d in DATA
-            if (d.get("filename", "") or "").lower().endswith(ext)
-        ]
+    if facet_index.n != len(DATA):
+        facet_index.build(DATA)
 
     now_ts = time.time()
-    filtered_by_date = []
-
-    for d in temp:
-        mt = d.get("modified_time") or d.get("created_time")
-        if not isinstance(mt, (int, float)):
-            filtered_by_date.append(d)
-            continue
-
-        age_seconds = now_ts - mt
-        day = 24 * 3600
-        keep = True
-
-        if selected_date == "Last 24 hours":
-            keep = age_seconds <= day
-        elif selected_date == "Last 7 days":
-            keep = age_seconds <= 7 * day
-        elif selected_date == "Last 30 days":
-            keep = age_seconds <= 30 * day
-        elif selected_date == "Older than 30 days":
-            keep = age_seconds > 30 * day
-
-        if keep:
-            filtered_by_date.append(d)
-
+    day = 24 * 3600
     MB = 1024 * 1024
-    filtered_by_size = []
 
-    for d in filtered_by_date:
-        size = d.get("size_bytes")
-        try:
-            size = int(size) if size is not None else 0
-        except Exception:
-            size = 0
-
-        keep = True
-        if selected_size == "< 1 MB":
-            keep = size < 1 * MB
-        elif selected_size == "1–10 MB":
-            keep = (size >= 1 * MB) and (size <= 10 * MB)
-        elif selected_size == "> 10 MB":
-            keep = size > 10 * MB
-
-        if keep:
-            filtered_by_size.append(d)
+    mask = np.ones(len(DATA), dtype=bool)
+
+    if selected_ext == "Images":
+        mask &= facet_index.ext_mask(IMAGE_EXTS)
+    elif selected_ext != "All":
+        mask &= facet_index.ext_mask([selected_ext])
+
+    if selected_date == "Last 24 hours":
+        mask &= facet_index.mtime_mask(lo=now_ts - day)
+    elif selected_date == "Last 7 days":
+        mask &= facet_index.mtime_mask(lo=now_ts - 7 * day)
+    elif selected_date == "Last 30 days":
+        mask &= facet_index.mtime_mask(lo=now_ts - 30 * day)
+    elif selected_date == "Older than 30 days":
+        mask &= facet_index.mtime_mask(hi=now_ts - 30 * day)
+
+    if selected_size == "< 1 MB":
+        mask &= facet_index.size_mask(hi=1 * MB)
+    elif selected_size == "1–10 MB":
+        mask &= facet_index.size_mask(lo=1 * MB, hi=10 * MB + 1)
+    elif selected_size == "> 10 MB":
+        mask &= facet_index.size_mask(lo=10 * MB + 1)
 
-    final_list = []
     st = (selected_tag or "").strip()
-    st_lower = st.lower()
+    if st and st != "All tags":
+        mask &= facet_index.tag_mask(st)
 
-    for d in filtered_by_size:
-        tags = [t.strip() for t in d.get("tags", []) if t]
-        if not st or st == "All tags":
-            final_list.append(d)
-        else:
-            tag_lowers = [t.lower() for t in tags]
-            if st_lower in tag_lowers:
-                final_list.append(d)
-
-    filtered_data = final_list
+    filtered_mask = mask
+    filtered_data = [DATA[i] for i in np.flatnonzero(mask)]
 
     if filtered_data:
         show_notification(f"✅ Filter → {len(filtered_data)} files", "lightgreen")
@@ -783,6 +866,38 @@ def update_filtered_data():
         show_notification("⚠ Filter matched no files", "orange")
 
 
+def apply_sort_order(results):
+    """Re-order results by the sort dropdown using the facet index ranks."""
+    try:
+        choice = sort_dropdown.get() if sort_dropdown else "Relevance"
+    except Exception:
+        choice = "Relevance"
+
+    if choice == "Newest first":
+        ranks = facet_index.rank("date", descending=True)
+    elif choice == "Oldest first":
+        ranks = facet_index.rank("date")
+    elif choice == "Largest first":
+        ranks = facet_index.rank("size", descending=True)
+    elif choice == "Smallest first":
+        ranks = facet_index.rank("size")
+    else:
+        return results
+
+    def _key(item):
+        idx = item.get("index")
+        if idx is None or not (0 <= idx < len(ranks)):
+            return len(ranks)
+        return int(ranks[idx])
+
+    return sorted(results, key=_key)
+
+
+def on_sort_change(_choice=None):
+    if last_results:
+        display_results(apply_sort_order(last_results), last_query)
+
+
 # ------------------ Normalization & scoring helpers ------------------
 def normalize_results(results, data):
     normalized = []
@@ -808,6 +923,7 @@ def normalize_results(results, data):
 
             normalized.append(
                 {
+                    "index": idx,
                     "filename": filename or "",
                     "path": path or "",
                     "text": text or "",
@@ -840,78 +956,94 @@ def normalize_score_list(lst, boost=50):
     return lst
 
 
-def find_exact_matches(data, query):
+# Every backend scores DATA positions (doc IDs) and only visits the ones
+# set in `mask`, so a narrow filter also means a cheap search.
+def _mask_ids(data, mask):
+    if mask is None:
+        return range(len(data))
+    return np.flatnonzero(mask)
+
+
+def find_exact_matches(data, query, mask=None):
     query_lower = query.lower().strip()
     if not query_lower:
         return []
+
+    # positional index answers word / phrase queries without touching texts
+    if data is DATA and phrase_index.n == len(data):
+        hits = phrase_index.search(query_lower, data, mask)
+        if hits is not None:
+            return [
+                {
+                    "index": i,
+                    "filename": data[i].get("filename", ""),
+                    "path": data[i].get("path", ""),
+                    "score": 100.0,
+                    "positions": hits[i],
+                }
+                for i in sorted(hits)
+            ]
+
     exact = []
-    for item in data:
+    for i in _mask_ids(data, mask):
+        item = data[i]
         text_lower = re.sub(r"\s+", " ", (item.get("text") or "").lower())
         try:
             if re.search(r"\b" + re.escape(query_lower) + r"\b", text_lower):
                 item_copy = item.copy()
+                item_copy["index"] = int(i)
                 item_copy["score"] = 100.0
                 exact.append(item_copy)
         except re.error:
             if query_lower in text_lower:
                 item_copy = item.copy()
+                item_copy["index"] = int(i)
                 item_copy["score"] = 100.0
                 exact.append(item_copy)
     return exact
 
 
-def merge_results(fuzzy, tfidf, embed, data, query=""):
-    WEIGHTS = {"fuzzy": 3.0, "tfidf": 4.0, "embed": 2.0}
+def merge_results(fuzzy, tfidf, embed, data, query="", mask=None, names=None, top_k=RESULT_LIMIT, fts=None):
+    WEIGHTS = {"exact": 1.0, "filename": 1.0, "fuzzy": 3.0, "tfidf": 4.0, "embed": 2.0, "fts": 3.0}
     partial_boost = 20.0
 
-    exact = find_exact_matches(data, query)
+    exact = find_exact_matches(data, query, mask)
     fuzzy = normalize_score_list(fuzzy, boost=40)
     tfidf = normalize_score_list(tfidf, boost=50)
     embed = normalize_score_list(embed, boost=50)
+    fts = normalize_score_list(fts or [], boost=50)
+
+    fused = weighted_sum(
+        {
+            "exact": to_arrays(exact),
+            "filename": to_arrays(names or []),
+            "fuzzy": to_arrays(fuzzy),
+            "tfidf": to_arrays(tfidf),
+            "embed": to_arrays(embed),
+            "fts": to_arrays(fts),
+        },
+        WEIGHTS,
+    )
 
-    combined = {}
-
-    for item in exact:
-        fn = item.get("filename", "")
-        if not fn:
-            continue
-        combined[fn] = {
-            "filename": fn,
-            "path": item.get("path", ""),
-            "text": item.get("text", ""),
-            "score": item.get("score", 100.0),
-        }
-
-    for lst, key in zip([fuzzy, tfidf, embed], ["fuzzy", "tfidf", "embed"]):
-        for item in lst:
-            fn = item.get("filename", "")
-            if not fn:
-                continue
-            sc = item.get("score", 0.0) * WEIGHTS.get(key, 1.0)
-            if (
-                query.strip().lower()
-                and query.strip().lower() in (item.get("text", "") or "").lower()
-            ):
-                sc += partial_boost
-            if fn not in combined:
-                combined[fn] = {
-                    "filename": fn,
-                    "path": item.get("path", ""),
-                    "text": item.get("text", ""),
-                    "score": sc,
-                }
-            else:
-                combined[fn]["score"] += sc
-
-    combined_list = list(combined.values())
+    combined_list = []
     q = (query or "").strip().lower()
+    # "Text contains": the query is a substring of the text ("invo" in "invoice")
+    # or one of its phrase matches
+    text_hits = {it["index"] for it in exact}
+    if q:
+        text_hits |= substring_hits(data, q, [r["index"] for r in fused if r["index"] not in text_hits])
 
-    for item in combined_list:
-        fn = item.get("filename", "") or ""
-        txt = (item.get("text", "") or "")
+    for r in fused:
+        d = data[r["index"]]
+        fn = d.get("filename", "") or ""
         fn_lower = fn.lower()
         name_no_ext = os.path.splitext(fn_lower)[0]
-        txt_lower = txt.lower()
+        text_hit = r["index"] in text_hits
+
+        base = r["score"]
+        if q and text_hit:
+            backends = [k for k in r["components"] if k not in ("exact", "filename")]
+            base += partial_boost * len(backends)
 
         boost = 0.0
         match_tags = []
@@ -924,59 +1056,153 @@ def merge_results(fuzzy, tfidf, embed, data, query=""):
                 boost += 800.0
                 match_tags.append("Filename contains")
 
-            if q in txt_lower:
+            if text_hit:
                 boost += 400.0
                 match_tags.append("Text contains")
 
         if not match_tags:
             match_tags.append("Fuzzy / semantic match")
 
-        base = float(item.get("score", 0.0))
-        item["base_score"] = base
-        item["score"] = base + boost
-        item["match_info"] = ", ".join(match_tags)
+        combined_list.append(
+            {
+                "index": r["index"],
+                "filename": fn,
+                "path": d.get("path", ""),
+                "tags": list(d.get("tags", []) or []),
+                "base_score": float(base),
+                "score": float(base) + boost,
+                "match_info": ", ".join(match_tags),
+            }
+        )
 
     combined_list.sort(key=lambda x: x.get("score", 0.0), reverse=True)
-    return combined_list[:5]
+    combined_list = combined_list[:top_k]
+    # text and hit offsets only for what is returned (docs may be read from the column store)
+    exact_pos = {it["index"]: it.get("positions") for it in exact}
+    for item in combined_list:
+        item["text"] = data[item["index"]].get("text", "") or ""
+        if data is DATA:
+            item["match_spans"] = query_match_spans(item["index"], q, exact_pos.get(item["index"]))
+    return combined_list
+
+
+def substring_hits(data, needle, ids):
+    """
+    The doc IDs among `ids` whose lowercased text contains `needle`. The
+    trigram index rules out most of them before any text is read.
+    """
+    if data is DATA and regex_index.num_docs == len(data):
+        cand = regex_index.literal_docs(needle)
+        if cand is not None:
+            ids = np.intersect1d(np.asarray(ids, dtype=np.int64), cand)
+    return {int(i) for i in ids if needle in (data[i].get("text", "") or "").lower()}
+
+
+def query_match_spans(index, query, positions=None):
+    """
+    Character spans of the query in DATA[index], read from the positional
+    index: the phrase hits at token `positions` when there are any,
+    otherwise every occurrence of the query's words.
+    """
+    terms = tokenize(query)
+    if not terms or phrase_index.n != len(DATA):
+        return []
+    if positions is not None and len(positions):
+        return phrase_index.phrase_spans(index, terms, positions)
+    return phrase_index.term_spans(index, terms)
 
 
 # ------------------ Search backends ------------------
-def search_fuzzy_backend(query, data, top_n=5):
-    res = []
+# should_stop: optional callable polled by the backends; once it turns true
+# the backend gives up and returns None (search superseded or past deadline)
+STOP_CHECK_EVERY = 64
+
+
+def search_fuzzy_backend(query, data, top_n=5, mask=None, should_stop=None):
     q = clean_text(query)
-    for item in data:
-        t = clean_text(item.get("text", ""))
-        sc = FUZZ_RATIO(q, t)
+
+    # trigram index narrows the corpus to the FUZZY_CANDIDATES docs sharing
+    # the most trigrams among those that can still reach FUZZY_MIN_SCORE;
+    # partial_ratio runs on those only
+    ids = None
+    if data is DATA and fuzzy_index.num_docs == len(data):
+        ids = fuzzy_index.candidates(q, mask, limit=FUZZY_CANDIDATES, min_score=FUZZY_MIN_SCORE)
+    if ids is None:
+        ids = _mask_ids(data, mask)
+
+    top = []  # min-heap of (score, -index); lower index wins ties
+    for k, i in enumerate(ids):
+        if should_stop is not None and k % STOP_CHECK_EVERY == 0 and should_stop():
+            return None
+        sc = FUZZ_RATIO(q, clean_text(data[i].get("text", "")))
+        entry = (sc, -int(i))
+        if len(top) < top_n:
+            heapq.heappush(top, entry)
+        elif entry > top[0]:
+            heapq.heapreplace(top, entry)
+
+    res = []
+    for sc, neg in sorted(top, reverse=True):
+        item = data[-neg]
         res.append(
             {
+                "index": -neg,
                 "filename": item.get("filename", ""),
                 "path": item.get("path", ""),
                 "text": item.get("text", ""),
                 "score": sc,
             }
         )
-    res = sorted(res, key=lambda x: x["score"], reverse=True)[:top_n]
     return res
 
 
-def search_tfidf_backend(query, data, top_n=5):
+def search_tfidf_backend(query, data, top_n=5, mask=None, should_stop=None):
+    if should_stop is not None and should_stop():
+        return None
     try:
-        raw = tfidf_engine.query(query, top_n)
+        raw = tfidf_engine.query(query, top_n, mask=mask)
         return normalize_results(raw, data)
     except Exception as e:
         print("TFIDF backend error:", e)
         return []
 
 
-def search_embed_backend(query, data, top_n=5):
+def search_embed_backend(query, data, top_n=5, mask=None, should_stop=None):
+    if should_stop is not None and should_stop():
+        return None
+    if data is DATA and tfidf_engine.documents is DATA:
+        # word-overlap straight from the TF-IDF postings, no text decoding
+        ids, counts = tfidf_engine.overlap(query, mask)
+        order = np.argsort(-counts, kind="stable")[:top_n]
+        ids, counts = ids[order], counts[order]
+        if ids.size < top_n:
+            # like the full scan: fill up with zero-overlap docs in ID order
+            pad = np.setdiff1d(np.asarray(_mask_ids(data, mask)), ids)[:top_n - ids.size]
+            ids = np.concatenate([ids, pad]).astype(np.int64)
+            counts = np.concatenate([counts, np.zeros(pad.size)])
+        res = [
+            {
+                "index": int(ids[j]),
+                "filename": data[ids[j]].get("filename", ""),
+                "path": data[ids[j]].get("path", ""),
+                "text": data[ids[j]].get("text", ""),
+                "score": float(counts[j]),
+            }
+            for j in range(ids.size)
+        ]
+        return normalize_results(res, data)
+
     q_words = set(clean_text(query).split())
     res = []
-    for i, item in enumerate(data):
+    for k, i in enumerate(_mask_ids(data, mask)):
+        if should_stop is not None and k % STOP_CHECK_EVERY == 0 and should_stop():
+            return None
+        item = data[i]
         words = set(clean_text(item.get("text", "")).split())
         common = len(q_words & words)
         res.append(
             {
-                "index": i,
+                "index": int(i),
                 "filename": item.get("filename", ""),
                 "path": item.get("path", ""),
                 "text": item.get("text", ""),
@@ -987,6 +1213,107 @@ def search_embed_backend(query, data, top_n=5):
     return normalize_results(res, data)
 
 
+def search_fts_backend(query, data, top_n=10, mask=None, should_stop=None):
+    """BM25 from the store's FTS5 index over the loaded folder, limited to the filter."""
+    if should_stop is not None and should_stop():
+        return None
+    if not (data is DATA and store is not None and loaded_folder is not None):
+        return []
+    doc_ids = None
+    if mask is not None:
+        doc_ids = [data[i]["db_id"] for i in np.flatnonzero(mask) if data[i].get("db_id") is not None]
+    res = []
+    for hit in store.fts_search(query, root=loaded_folder, limit=top_n, doc_ids=doc_ids):
+        i = db_id_index.get(hit["db_id"])
+        if i is None:
+            continue
+        res.append(
+            {
+                "index": i,
+                "filename": data[i].get("filename", ""),
+                "path": data[i].get("path", ""),
+                "score": hit["score"],
+            }
+        )
+    return res
+
+
+def search_filename_backend(query, data, top_n=10, mask=None, should_stop=None):
+    if should_stop is not None and should_stop():
+        return None
+    if not (data is DATA and filename_index.num_docs == len(data)):
+        return []
+    hits = filename_index.search(query, mask, scorer=FUZZ_RATIO, limit=top_n)
+    res = []
+    for i, (sc, kind) in hits.items():
+        item = data[i]
+        res.append(
+            {
+                "index": i,
+                "filename": item.get("filename", ""),
+                "path": item.get("path", ""),
+                "text": item.get("text", ""),
+                "score": sc,
+                "name_match": kind,
+            }
+        )
+    res.sort(key=lambda x: x["score"], reverse=True)
+    return res
+
+
+def search_regex_backend(pattern, data, top_n=5, mask=None, max_matches=100, should_stop=None):
+    """
+    Case-insensitive regex over the raw text. Literals the pattern requires
+    are looked up in the trigram index first; only surviving docs get the
+    full regex.
+    """
+    try:
+        rx = re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        show_notification(f"⚠ Invalid regex: {e}", "orange")
+        return []
+
+    ids = None
+    if data is DATA and regex_index.num_docs == len(data):
+        ids = regex_index.clause_candidates(regex_literals(pattern), mask)
+    if ids is None:
+        ids = _mask_ids(data, mask)
+
+    res = []
+    for k, i in enumerate(ids):
+        if should_stop is not None and k % STOP_CHECK_EVERY == 0 and should_stop():
+            return None
+        item = data[i]
+        spans = []
+        for m in rx.finditer(item.get("text", "") or ""):
+            spans.append(m.span())
+            if len(spans) >= max_matches:
+                break
+        if not spans:
+            continue
+        res.append(
+            {
+                "index": int(i),
+                "filename": item.get("filename", ""),
+                "path": item.get("path", ""),
+                "text": item.get("text", ""),
+                "tags": list(item.get("tags", []) or []),
+                "score": float(len(spans)),
+                "match_spans": spans,
+                "match_info": f"Regex match ({len(spans)})",
+            }
+        )
+    res.sort(key=lambda x: x["score"], reverse=True)
+    return res[:top_n]
+
+
+def regex_mode_enabled():
+    try:
+        return bool(regex_mode_var is not None and regex_mode_var.get())
+    except Exception:
+        return False
+
+
 # ------------------ Share helper ------------------
 def share_item_popup(item):
     global root
@@ -1077,6 +1404,216 @@ def share_item_popup(item):
 
 
 # ------------------ Result preview popup ------------------
+# ------------------ Preview helpers ------------------
+def split_text_chunks(text, size=TEXT_CHUNK_CHARS):
+    """Cut text into pieces of about size characters, ending on a line break when one is near."""
+    chunks, start, n = [], 0, len(text)
+    while start < n:
+        end = min(n, start + size)
+        if end < n:
+            nl = text.find("\n", end, end + size)
+            if nl >= 0:
+                end = nl + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class ChunkedTextPreview:
+    """
+    Read-only textbox that holds a window of TEXT_WINDOW_CHUNKS chunks of a
+    long text. A poll on the scroll position loads the next / previous chunk
+    when the view nears an edge and drops the chunk at the far end, so a
+    500-page PDF never goes into the widget in one insert.
+    """
+
+    EDGE = 0.15  # load more when the view is this close to the top / bottom
+    POLL_MS = 120
+
+    def __init__(self, parent, text):
+        self.textbox = ctk.CTkTextbox(parent, wrap="word")
+        self.chunks = split_text_chunks(text)
+        self.lo = self.hi = 0  # chunks[lo:hi] are in the textbox
+        for _ in range(min(2, len(self.chunks))):
+            self._append()
+        self.textbox.configure(state="disabled")
+        if self.hi < len(self.chunks):
+            self.textbox.after(self.POLL_MS, self._poll)
+
+    def _append(self):
+        self.textbox.insert("end", self.chunks[self.hi], (f"chunk{self.hi}",))
+        self.hi += 1
+
+    def _prepend(self):
+        self.lo -= 1
+        self.textbox.insert("1.0", self.chunks[self.lo], (f"chunk{self.lo}",))
+
+    def _drop(self, i):
+        ranges = self.textbox.tag_ranges(f"chunk{i}")
+        if ranges:
+            self.textbox.delete(ranges[0], ranges[-1])
+
+    def _shift(self, forward):
+        tb = self.textbox
+        tb.configure(state="normal")
+        # the mark follows the text under the top of the view through inserts / deletes
+        tb.mark_set("view_top", "@0,0")
+        if forward:
+            self._append()
+            if self.hi - self.lo > TEXT_WINDOW_CHUNKS:
+                self._drop(self.lo)
+                self.lo += 1
+        else:
+            self._prepend()
+            if self.hi - self.lo > TEXT_WINDOW_CHUNKS:
+                self.hi -= 1
+                self._drop(self.hi)
+        tb.yview("view_top")
+        tb.configure(state="disabled")
+
+    def _poll(self):
+        try:
+            if not self.textbox.winfo_exists():
+                return
+            top, bottom = self.textbox.yview()
+            if bottom > 1 - self.EDGE and self.hi < len(self.chunks):
+                self._shift(forward=True)
+            elif top < self.EDGE and self.lo > 0:
+                self._shift(forward=False)
+            self.textbox.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            pass  # preview window closed
+
+
+def show_fit_image_preview(parent, path, size=PREVIEW_SIZE):
+    """
+    Progressive preview: the cached card thumbnail is stretched in at once,
+    then replaced by a reduced-scale decode from the thumbnail pool.
+    """
+    label = ctk.CTkLabel(parent, text="Loading preview…")
+    label.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+
+    def set_image(pil_img):
+        img_tk = ImageTk.PhotoImage(pil_img)
+        label.configure(image=img_tk, text="")
+        label.image = img_tk
+
+    quick = thumbs.peek(path)
+    if quick is not None:
+        scale = min(size[0] / quick.width, size[1] / quick.height)
+        set_image(quick.resize(
+            (max(1, int(quick.width * scale)), max(1, int(quick.height * scale))),
+            Image.BILINEAR,
+        ))
+
+    def done(img, err):
+        try:
+            if not label.winfo_exists():
+                return
+            if img is not None:
+                set_image(img)
+            elif quick is None:
+                label.configure(text=f"Unable to load image preview:\n{err}", text_color="red")
+        except tk.TclError:
+            pass
+
+    def work():
+        try:
+            img, err = decode_thumbnail(path, size), None
+        except Exception as e:
+            img, err = None, e
+        if root is not None:
+            root.after(0, lambda: done(img, err))
+
+    thumbs.pool.submit(work)
+    return label
+
+
+class TiledImagePreview:
+    """
+    Scrollable view of a very tall image at display width. Only the tiles
+    around the visible region are decoded (on the thumbnail pool) and kept
+    as PhotoImages; tiles far from the view are dropped again.
+    """
+
+    KEEP = 4  # tiles kept above / below the view
+
+    def __init__(self, parent, tiled):
+        self.tiled = tiled
+        self.photos = {}  # tile -> PhotoImage (kept alive for the canvas)
+        self.requested = set()
+
+        self.frame = ctk.CTkFrame(parent, fg_color="transparent")
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.canvas = tk.Canvas(
+            self.frame,
+            width=tiled.width,
+            height=PREVIEW_SIZE[1],
+            bg="gray20",
+            highlightthickness=0,
+            scrollregion=(0, 0, tiled.width, tiled.height),
+        )
+        self.canvas.grid(row=0, column=0, sticky="ns")
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        th = self.tiled.tile_height
+        i0 = int(float(first) * self.tiled.height // th)
+        i1 = int(float(last) * self.tiled.height // th)
+
+        for i in list(self.photos):
+            if i < i0 - self.KEEP or i > i1 + self.KEEP:
+                self.canvas.delete(f"tile{i}")
+                del self.photos[i]
+                self.requested.discard(i)
+        for i in range(max(0, i0 - 1), min(len(self.tiled), i1 + 2)):
+            if i not in self.requested:
+                self.requested.add(i)
+                thumbs.pool.submit(self._render, i)
+
+    def _render(self, i):
+        try:
+            img = self.tiled.tile(i)
+        except Exception as e:
+            print(f"Preview tile error ({self.tiled.path}): {e}")
+            return
+        if root is not None:
+            root.after(0, lambda: self._place(i, img))
+
+    def _place(self, i, img):
+        try:
+            if i not in self.requested or i in self.photos or not self.canvas.winfo_exists():
+                return
+            photo = ImageTk.PhotoImage(img)
+            self.photos[i] = photo
+            self.canvas.create_image(0, self.tiled.tile_box(i)[0], image=photo, anchor="nw", tags=(f"tile{i}",))
+        except tk.TclError:
+            pass
+
+    def close(self):
+        self.photos.clear()
+        self.tiled.close()
+
+
+def show_image_preview(win, parent, path):
+    """Tall images scroll in tiles at display width; everything else fits the preview."""
+    with Image.open(path) as img:
+        w, h = img.size
+    if h >= TALL_PREVIEW_RATIO * w and h > PREVIEW_SIZE[1]:
+        view = TiledImagePreview(parent, TiledImage(path, PREVIEW_SIZE[0]))
+        view.frame.grid(row=0, column=0, sticky="ns", padx=5, pady=5)
+        win.bind("<Destroy>", lambda e: view.close() if e.widget is win else None, add="+")
+        return view
+    return show_fit_image_preview(parent, path)
+
+
 def show_item_preview(item):
     global root
     if root is None:
@@ -1155,14 +1692,7 @@ def show_item_preview(item):
 
     if ext in [".jpg", ".jpeg", ".png"]:
         try:
-            img = Image.open(path)
-            max_w, max_h = 820, 460
-            img.thumbnail((max_w, max_h))
-            img_tk = ImageTk.PhotoImage(img)
-
-            img_label = ctk.CTkLabel(content, image=img_tk, text="")
-            img_label.image = img_tk
-            img_label.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+            show_image_preview(win, content, path)
         except Exception as e:
             err_lbl = ctk.CTkLabel(
                 content,
@@ -1172,13 +1702,8 @@ def show_item_preview(item):
             )
             err_lbl.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
     else:
-        textbox = ctk.CTkTextbox(content, wrap="word")
-        textbox.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        if text:
-            textbox.insert("1.0", text)
-        else:
-            textbox.insert("1.0", "No extracted text available for this file.")
-        textbox.configure(state="disabled")
+        preview = ChunkedTextPreview(content, text or "No extracted text available for this file.")
+        preview.textbox.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
 
 def clear_frame_children(frame):
@@ -1189,205 +1714,487 @@ def clear_frame_children(frame):
             pass
 
 
-def display_results(results, query):
-    clear_frame_children(result_frame)
+def clamp_text(text, font, lines=1, width=CARD_TEXT_WIDTH):
+    """
+    `text` cut to what wraps into `lines` lines of `width` px in `font`
+    (a CTk (family, size) tuple), ending in "…" when anything was cut.
+    Wrapping follows Tk's: at spaces, inside a word only when it alone is
+    too wide.
+    """
+    f = _measure_fonts.get(font)
+    if f is None:
+        f = _measure_fonts[font] = tkfont.Font(family=font[0], size=-abs(font[1]))
+    text = " ".join((text or "").split())
+    if f.measure(text) <= width:
+        return text
+
+    rows, line = [], ""
+    for word in text.split(" "):
+        cand = f"{line} {word}" if line else word
+        if f.measure(cand) <= width:
+            line = cand
+            continue
+        if line:
+            rows.append(line)
+        while f.measure(word) > width and len(rows) <= lines:
+            lo, hi = 1, len(word) - 1  # longest prefix that fits, at least one char
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if f.measure(word[:mid]) <= width:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            k = lo
+            rows.append(word[:k])
+            word = word[k:]
+        line = word
+        if len(rows) > lines:
+            break
+    rows.append(line)
+    if len(rows) <= lines:
+        return text
 
-    if not results:
-        lbl = ctk.CTkLabel(
-            result_frame,
-            text="No results found. Try a different keyword.",
-            font=("Segoe UI", 12),
-            text_color=("gray20", "gray80"),
-        )
-        lbl.pack(pady=15)
-        show_notification("⚠ No results found for this query", "orange")
-        return
+    last = rows[lines - 1]
+    while last and f.measure(last + "…") > width:
+        last = last[:-1]
+    return "\n".join(rows[:lines - 1] + [last.rstrip() + "…"])
 
-    q_lower = (query or "").lower().strip()
 
-    for item in results:
-        if "tags" not in item or not isinstance(item["tags"], list):
-            item["tags"] = []
+def _preview_snippet(item, q_lower):
+    """Windows around the hit offsets the search returned, hits in [brackets]."""
+    full_text = item.get("text", "") or ""
+    spans = item.get("match_spans")
+    if not spans and q_lower:
+        # results without offsets: look near the start only
+        start = full_text[:320].lower().find(q_lower)
+        if start != -1:
+            spans = [(start, start + len(q_lower))]
+    return make_snippet(full_text, spans or [])
 
-        card = ctk.CTkFrame(result_frame, corner_radius=12)
-        card.pack(padx=12, pady=8, fill="x")
 
-        ext = os.path.splitext(item["filename"])[1].lower()
+class ResultCard:
+    """
+    One result card built once and re-bound to a different item by show();
+    the result view keeps PAGE_SIZE of these instead of rebuilding widgets.
+    Cards have a fixed height (CARD_HEIGHT) so rows sit at known offsets;
+    show() clamps every text row to its line budget so nothing is clipped.
+    """
+
+    TITLE_FONT = ("Segoe UI Semibold", 14)
+    MATCH_FONT = ("Segoe UI", 10)
+    BODY_FONT = ("Segoe UI", 11)
+    SMALL_FONT = ("Segoe UI", 9)
+
+    def __init__(self, parent):
+        self.item = None
+        self.frame = ctk.CTkFrame(parent, corner_radius=12, height=CARD_HEIGHT)
+        self.frame.pack_propagate(False)
 
-        left_container = ctk.CTkFrame(card, fg_color="transparent")
+        left_container = ctk.CTkFrame(self.frame, fg_color="transparent")
         left_container.pack(side="left", padx=10, pady=10)
 
-        right_container = ctk.CTkFrame(card, fg_color="transparent")
+        right_container = ctk.CTkFrame(self.frame, fg_color="transparent")
         right_container.pack(
             side="left", fill="both", expand=True, padx=(0, 10), pady=10
         )
 
-        if ext in [".jpg", ".jpeg", ".png"]:
-            img_thumb = get_thumbnail_image(item["path"])
-            if img_thumb:
-                img_label = ctk.CTkLabel(
-                    left_container, image=img_thumb, text=""
-                )
-                img_label.image = img_thumb
-                img_label.pack()
-                img_label.bind(
-                    "<Button-1>", lambda e, p=item["path"]: open_file(p)
-                )
-        else:
-            if ext == ".pdf":
-                doc_icon = "📄"
-            elif ext in [".doc", ".docx", ".txt"]:
-                doc_icon = "📝"
-            else:
-                doc_icon = "📁"
-
-            doc_label = ctk.CTkLabel(
-                left_container, text=doc_icon, font=("Segoe UI Emoji", 30)
-            )
-            doc_label.pack()
-            doc_label.bind(
-                "<Button-1>", lambda e, p=item["path"]: open_file(p)
-            )
+        # image and icon live in separate labels: a CTkLabel cannot drop an image
+        self.image_label = ctk.CTkLabel(left_container, text="")
+        self.icon_label = ctk.CTkLabel(
+            left_container, text="", font=("Segoe UI Emoji", 30)
+        )
+        for lbl in (self.image_label, self.icon_label):
+            lbl.bind("<Button-1>", lambda e: self._call(open_file, "path"))
 
-        title_label = ctk.CTkLabel(
+        self.title_label = ctk.CTkLabel(
             right_container,
-            text=item["filename"],
-            font=("Segoe UI Semibold", 14),
+            text="",
+            font=self.TITLE_FONT,
             anchor="w",
         )
-        title_label.pack(fill="x")
-
-        total_score = float(item.get("score", 0.0))
-        fuzzy_score = float(item.get("fuzzy_score", 0.0))
-        tfidf_score = float(item.get("tfidf_score", 0.0))
-        embed_score = float(item.get("embed_score", 0.0))
-
-        score_text = (
-            f"Total: {total_score:.3f}  |  "
-            f"Fuzzy: {fuzzy_score:.1f}  •  "
-            f"TF-IDF: {tfidf_score:.1f}  •  "
-            f"Embed: {embed_score:.1f}"
-        )
+        self.title_label.pack(fill="x")
 
-        score_label = ctk.CTkLabel(
+        self.score_label = ctk.CTkLabel(
             right_container,
-            text=score_text,
+            text="",
             font=("Segoe UI", 11),
             text_color=("gray25", "gray80"),
         )
-        score_label.pack(anchor="w", pady=(2, 2))
+        self.score_label.pack(anchor="w", pady=(2, 2))
 
-        match_info = item.get("match_info", "Fuzzy / semantic match")
-        match_label = ctk.CTkLabel(
+        self.match_label = ctk.CTkLabel(
             right_container,
-            text=f"Match: {match_info}",
-            font=("Segoe UI", 10),
+            text="",
+            font=self.MATCH_FONT,
             text_color=("gray30", "gray70"),
         )
-        match_label.pack(anchor="w", pady=(0, 4))
-
-        full_text = item.get("text", "") or ""
-        preview = full_text[:320]
-
-        if q_lower and q_lower in preview.lower():
-            try:
-                lower_preview = preview.lower()
-                start = lower_preview.find(q_lower)
-                end = start + len(q_lower)
-                if start != -1:
-                    preview = (
-                        preview[:start]
-                        + "["
-                        + preview[start:end]
-                        + "]"
-                        + preview[end:]
-                    )
-            except Exception:
-                pass
+        self.match_label.pack(anchor="w", pady=(0, 4))
 
-        body_label = ctk.CTkLabel(
+        self.body_label = ctk.CTkLabel(
             right_container,
-            text="Preview: " + preview + ("..." if preview else ""),
+            text="",
             justify="left",
-            wraplength=550,
-            font=("Segoe UI", 11),
+            wraplength=CARD_TEXT_WIDTH,
+            font=self.BODY_FONT,
         )
-        body_label.pack(anchor="w")
+        self.body_label.pack(anchor="w")
 
-        location = item.get("path", "") or ""
-        location_label = ctk.CTkLabel(
+        self.location_label = ctk.CTkLabel(
             right_container,
-            text=f"Location: {location}",
-            font=("Segoe UI", 9),
+            text="",
+            font=self.SMALL_FONT,
             text_color=("gray30", "gray60"),
-            wraplength=550,
             justify="left",
         )
-        location_label.pack(anchor="w", pady=(4, 2))
+        self.location_label.pack(anchor="w", pady=(4, 2))
 
-        tags_text = ", ".join(item.get("tags", [])) if item.get("tags") else "None"
-        tags_label = ctk.CTkLabel(
+        self.tags_label = ctk.CTkLabel(
             right_container,
-            text=f"Tags: {tags_text}",
-            font=("Segoe UI", 9),
+            text="",
+            font=self.SMALL_FONT,
             text_color=("gray35", "gray65"),
         )
-        tags_label.pack(anchor="w", pady=(0, 2))
+        self.tags_label.pack(anchor="w", pady=(0, 2))
 
         btn_frame = ctk.CTkFrame(right_container, fg_color="transparent")
         btn_frame.pack(fill="x", pady=(4, 0))
 
-        tags_btn = ctk.CTkButton(
-            btn_frame,
-            text="Tags",
-            width=60,
-            command=lambda it=item: open_tag_manager(it),
-        )
-        tags_btn.pack(side="right", padx=(4, 0))
+        buttons = [
+            ("Tags", 60, lambda: self._call(open_tag_manager)),
+            ("Share", 80, lambda: self._call(share_item_popup)),
+            ("Preview", 80, lambda: self._call(show_item_preview)),
+            ("Open location", 110, lambda: self._call(open_location, "path")),
+            ("Open file", 90, lambda: self._call(open_file, "path")),
+        ]
+        for text, width, command in buttons:
+            btn = ctk.CTkButton(btn_frame, text=text, width=width, command=command)
+            btn.pack(side="right", padx=(4, 0))
 
-        share_btn = ctk.CTkButton(
-            btn_frame,
-            text="Share",
-            width=80,
-            command=lambda it=item: share_item_popup(it),
-        )
-        share_btn.pack(side="right", padx=(4, 0))
+    def _call(self, fn, key=None):
+        if self.item is not None:
+            fn(self.item[key] if key else self.item)
 
-        preview_btn = ctk.CTkButton(
-            btn_frame,
-            text="Preview",
-            width=80,
-            command=lambda it=item: show_item_preview(it),
-        )
-        preview_btn.pack(side="right", padx=(4, 0))
+    def show(self, item, q_lower, row):
+        if "tags" not in item or not isinstance(item["tags"], list):
+            item["tags"] = []
+        self.item = item
 
-        open_loc_btn = ctk.CTkButton(
-            btn_frame,
-            text="Open location",
-            width=110,
-            command=lambda p=item["path"]: open_location(p),
-        )
-        open_loc_btn.pack(side="right", padx=(4, 0))
+        ext = os.path.splitext(item["filename"])[1].lower()
+        if ext in [".jpg", ".jpeg", ".png"]:
+            # memory hit renders now; otherwise a placeholder until the pool calls back
+            cached = thumbs.peek(item["path"])
+            if cached is not None:
+                self._set_image(cached)
+            else:
+                self._set_icon("🖼️")
+            thumbs.request(item["path"], self._thumbnail_ready)
+        else:
+            if ext == ".pdf":
+                doc_icon = "📄"
+            elif ext in [".doc", ".docx", ".txt"]:
+                doc_icon = "📝"
+            else:
+                doc_icon = "📁"
+            self._set_icon(doc_icon)
 
-        open_file_btn = ctk.CTkButton(
-            btn_frame,
-            text="Open file",
-            width=90,
-            command=lambda p=item["path"]: open_file(p),
+        self.title_label.configure(text=clamp_text(item["filename"], self.TITLE_FONT))
+
+        total_score = float(item.get("score", 0.0))
+        fuzzy_score = float(item.get("fuzzy_score", 0.0))
+        tfidf_score = float(item.get("tfidf_score", 0.0))
+        embed_score = float(item.get("embed_score", 0.0))
+        self.score_label.configure(
+            text=(
+                f"Total: {total_score:.3f}  |  "
+                f"Fuzzy: {fuzzy_score:.1f}  •  "
+                f"TF-IDF: {tfidf_score:.1f}  •  "
+                f"Embed: {embed_score:.1f}"
+            )
         )
-        open_file_btn.pack(side="right", padx=(4, 0))
+
+        match_info = item.get("match_info", "Fuzzy / semantic match")
+        self.match_label.configure(text=clamp_text(f"Match: {match_info}", self.MATCH_FONT))
+
+        preview = _preview_snippet(item, q_lower)
+        self.body_label.configure(text=clamp_text(
+            "Preview: " + preview + ("..." if preview else ""), self.BODY_FONT, CARD_BODY_LINES
+        ))
+
+        location = item.get("path", "") or ""
+        self.location_label.configure(text=clamp_text(f"Location: {location}", self.SMALL_FONT))
+
+        tags_text = ", ".join(item.get("tags", [])) if item.get("tags") else "None"
+        self.tags_label.configure(text=clamp_text(f"Tags: {tags_text}", self.SMALL_FONT))
+
+        self.frame.grid(row=row, column=0, padx=12, pady=CARD_PAD, sticky="ew")
+
+    def hide(self):
+        self.item = None
+        self.frame.grid_remove()
+
+    def _set_image(self, pil_img):
+        img_thumb = ImageTk.PhotoImage(pil_img)
+        self.image_label.configure(image=img_thumb)
+        self.image_label.image = img_thumb
+        self.icon_label.pack_forget()
+        self.image_label.pack()
+
+    def _set_icon(self, icon):
+        self.icon_label.configure(text=icon)
+        self.image_label.pack_forget()
+        self.icon_label.pack()
+
+    def _thumbnail_ready(self, path, pil_img):
+        # pool thread -> UI thread; the card may show another item by now
+        def swap():
+            if self.item is not None and self.item.get("path") == path:
+                self._set_image(pil_img)
+
+        if root is not None:
+            root.after(0, swap)
+
+
+def _ensure_result_view():
+    """Build the card pool, empty-state label and spacers once per result_frame."""
+    global _result_view_frame, _empty_label, _spacers
+    if _result_view_frame is result_frame and _card_pool:
+        return
+    clear_frame_children(result_frame)
+    _card_pool.clear()
+    result_frame.grid_columnconfigure(0, weight=1)
+
+    _empty_label = ctk.CTkLabel(
+        result_frame,
+        text="No results found. Try a different keyword.",
+        font=("Segoe UI", 12),
+        text_color=("gray20", "gray80"),
+    )
+    # stand-ins for the rows above and below the bound cards
+    _spacers = [
+        tk.Frame(result_frame, height=0, bd=0, highlightthickness=0) for _ in range(2)
+    ]
+    _spacers[0].grid(row=1, column=0, sticky="ew")
+    _spacers[1].grid(row=PAGE_SIZE + 2, column=0, sticky="ew")
+    for _ in range(PAGE_SIZE):
+        _card_pool.append(ResultCard(result_frame))
+
+    def on_scroll(first, last):
+        result_frame._scrollbar.set(first, last)
+        render_result_window()
+
+    # every view change (wheel, scrollbar, resize) re-binds the visible rows
+    result_frame._parent_canvas.configure(yscrollcommand=on_scroll)
+    _result_view_frame = result_frame
+
+
+def render_result_window(force=False):
+    """
+    Virtual list: the full result list keeps its scroll height, but only
+    the PAGE_SIZE rows under the viewport are bound to pooled cards; the
+    spacers stand in for the rest.
+    """
+    if result_frame is None or not _card_pool:
+        return
+    results = _result_view["results"]
+    slot = _card_pool[0].frame.winfo_reqheight() + 2 * CARD_PAD
+    top = result_frame._parent_canvas.canvasy(0)
+    first = min(max(int(top // slot), 0), max(len(results) - PAGE_SIZE, 0))
+    if first == _result_view["first"] and not force:
+        return
+    _result_view["first"] = first
+    q_lower = (_result_view["query"] or "").lower().strip()
+
+    for j, card in enumerate(_card_pool):
+        k = first + j
+        if k < len(results):
+            card.show(results[k], q_lower, row=j + 2)
+        else:
+            card.hide()
+    bound = min(PAGE_SIZE, max(len(results) - first, 0))
+    bg = tk.Frame.cget(result_frame, "bg")
+    _spacers[0].configure(height=max(first * slot, 0), bg=bg)
+    _spacers[1].configure(height=max((len(results) - first - bound) * slot, 0), bg=bg)
+
+    # warm the thumbnail cache for the rows just below
+    for item in results[first + PAGE_SIZE:first + 2 * PAGE_SIZE]:
+        if os.path.splitext(item.get("filename", ""))[1].lower() in (".jpg", ".jpeg", ".png"):
+            thumbs.request(item.get("path", ""))
+
+
+def render_results(to_top=True):
+    """Show _result_view["results"], from the top of the list unless to_top=False."""
+    if result_frame is None:
+        return
+    _ensure_result_view()
+    if _result_view["results"]:
+        _empty_label.grid_remove()
+    else:
+        _empty_label.grid(row=0, column=0, pady=15)
+    if to_top:
+        try:
+            result_frame._parent_canvas.yview_moveto(0)
+        except Exception:
+            pass
+    render_result_window(force=True)
+
+
+def display_results(results, query, notify=True, gen=None):
+    """
+    notify=False: an empty list only shows the pane's empty state (typeahead).
+    gen: search generation the results belong to; a later delivery for the
+    one already shown (partial -> refined -> final) keeps the scroll position.
+    """
+    same_search = gen is not None and gen == _result_view["gen"]
+    _result_view["results"] = list(results or [])
+    _result_view["query"] = query or ""
+    _result_view["gen"] = gen
+    render_results(to_top=not same_search)
+    if not results and notify:
+        show_notification("⚠ No results found for this query", "orange")
 
 
 # ------------------ Search trigger ------------------
+def run_search_backends(query, mask=None, stale=None, publish=None):
+    """
+    Filename + fuzzy + TF-IDF + overlap + FTS5 backends over DATA, run concurrently
+    on backend_pool, then fused and boosted. Each backend has its own
+    deadline (BACKEND_DEADLINES, seconds from when it starts running, so
+    time queued behind another search does not count); one that misses it
+    contributes nothing and is listed in every result's "late_backends".
+    stale: optional callable; when it turns true the search is abandoned
+    and None is returned. Backends poll both through should_stop, so
+    abandoned or late work frees its pool worker.
+    publish: optional callable given the fused list of the backends that
+    have answered so far (exact + filename hits first), whenever its order
+    changes before the final result.
+    """
+    stale = stale or (lambda: False)
+    backends = {
+        "filename": search_filename_backend,
+        "fuzzy": search_fuzzy_backend,
+        "tfidf": search_tfidf_backend,
+        "overlap": search_embed_backend,
+        "fts": search_fts_backend,
+    }
+    started = {}
+
+    def past_deadline(name):
+        began = started.get(name)
+        return began is not None and time.perf_counter() > began + BACKEND_DEADLINES.get(name, 1.0)
+
+    def run(name, fn, top_n):
+        started[name] = time.perf_counter()
+        return fn(query, DATA, top_n, mask=mask,
+                  should_stop=lambda: stale() or past_deadline(name))
+
+    # overlap pads with zero-overlap docs, so it only gets a page's worth;
+    # fuzzy hits only boost fused docs, so it gets FUZZY_TOP_N
+    limits = {"overlap": PAGE_SIZE, "fuzzy": FUZZY_TOP_N}
+    futures = {
+        name: backend_pool.submit(run, name, fn, limits.get(name, RESULT_LIMIT))
+        for name, fn in backends.items()
+    }
+
+    def abandon():
+        for fut in futures.values():
+            fut.cancel()  # queued ones; running ones see stale() and stop
+        return None
+
+    raw = {name: [] for name in backends}
+    late = []
+    shown = None
+    last = list(futures)[-1]
+    for name, fut in futures.items():
+        budget = BACKEND_DEADLINES.get(name, 1.0)
+        while True:
+            began = started.get(name)
+            # until the backend leaves the queue, only watch for staleness
+            wait = 0.05 if began is None else max(0.0, began + budget - time.perf_counter())
+            try:
+                result = fut.result(timeout=wait)
+            except FutureTimeout:
+                if stale():
+                    return abandon()
+                if began is None:
+                    continue
+                late.append(name)
+            except Exception:
+                pass
+            else:
+                # None: the backend saw its deadline pass and gave up
+                if result is None:
+                    late.append(name)
+                else:
+                    raw[name] = result
+            break
+        if stale():
+            return abandon()
+        if publish is not None and name != last:
+            partial = fuse_backend_results(query, mask, raw)
+            order = [r["index"] for r in partial]
+            if partial and order != shown:
+                shown = order
+                publish(partial)
+
+    return fuse_backend_results(query, mask, raw, late)
+
+
+def fuse_backend_results(query, mask, raw, late=()):
+    """merge_results + feedback over {backend: results}; missing backends are []."""
+    name_raw, fuzzy_raw = raw.get("filename", []), raw.get("fuzzy", [])
+    tfidf_raw, embed_raw = raw.get("tfidf", []), raw.get("overlap", [])
+    fts_raw = raw.get("fts", [])
+
+    fuzzy_map = {i.get("index"): float(i.get("score", 0.0)) for i in fuzzy_raw}
+    tfidf_map = {i.get("index"): float(i.get("score", 0.0)) for i in tfidf_raw}
+    embed_map = {i.get("index"): float(i.get("score", 0.0)) for i in embed_raw}
+
+    combined = merge_results(
+        fuzzy_raw, tfidf_raw, embed_raw, DATA, query, mask=mask, names=name_raw, fts=fts_raw
+    )
+
+    try:
+        combined = apply_feedback(combined)
+    except Exception:
+        pass
+
+    for item in combined:
+        idx = item.get("index")
+        item["fuzzy_score"] = fuzzy_map.get(idx, 0.0)
+        item["tfidf_score"] = tfidf_map.get(idx, 0.0)
+        item["embed_score"] = embed_map.get(idx, 0.0)
+        item["late_backends"] = list(late)
+        if "tags" not in item or not isinstance(item["tags"], list):
+            item["tags"] = []
+
+    return combined
+
+
+def _mask_key(mask):
+    """Short digest of the active filter mask (part of the result cache key)."""
+    if mask is None:
+        return None
+    return hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=8).hexdigest()
+
+
 def search_query():
-    global filtered_data
+    """
+    Read the query and filters on the UI thread and hand them to the search
+    worker; results come back through root.after (deliver_search_results).
+    """
+    global filtered_data, _typeahead_after, _last_full_search
+
+    # a typeahead still waiting on its debounce would supersede this search
+    if _typeahead_after is not None and root is not None:
+        root.after_cancel(_typeahead_after)
+    _typeahead_after = None
 
     query = search_entry.get().strip()
     if not query:
         show_notification("⚠ Please enter a search query", "orange")
         return
 
-    if not filtered_data:
+    if filtered_mask is None or len(filtered_mask) != len(DATA):
         update_filtered_data()
 
     if not filtered_data:
@@ -1395,60 +2202,129 @@ def search_query():
         return
 
     if progress_label is not None:
+        progress_label.configure(text=f"Searching: {query}")
 
-        def _set_search():
-            progress_label.configure(text=f"Searching: {query}")
+    show_notification("🔎 Searching in your screenshots & docs...", "lightblue")
+    gen = submit_search(query, filtered_mask, regex_mode_enabled())
+    _last_full_search = (query, gen)
 
-        root.after(0, _set_search)
 
-    show_notification("🔎 Searching in your screenshots & docs...", "lightblue")
+def submit_search(query, mask, regex=False, mode="full"):
+    """
+    Queue a search; any older one still waiting or running becomes stale.
+    mode: "full" (every backend) or "prefix" (search-as-you-type).
+    """
+    global search_generation, _search_pending, _search_worker
+    with _search_cond:
+        search_generation += 1
+        _search_pending = (search_generation, query, mask, regex, mode)
+        if _search_worker is None:
+            _search_worker = threading.Thread(target=_search_loop, daemon=True)
+            _search_worker.start()
+        _search_cond.notify()
+        return search_generation
+
+
+def is_stale_search(gen):
+    return gen != search_generation
+
+
+def _search_loop():
+    """Worker: always runs the newest request, skipping superseded ones."""
+    global _search_pending
+    while True:
+        with _search_cond:
+            while _search_pending is None:
+                _search_cond.wait()
+            gen, query, mask, regex, mode = _search_pending
+            _search_pending = None
+        try:
+            if mode == "prefix":
+                combined = typeahead_results(query, mask)
+            else:
+                combined = compute_search_results(
+                    gen, query, mask, regex, publish=_publisher(gen, query)
+                )
+        except Exception as e:
+            print("Search error:", e)
+            traceback.print_exc()
+            show_notification("❌ Search failed (see console)", "red")
+            continue
+        if combined is None or is_stale_search(gen):
+            continue
+        if root is not None:
+            root.after(
+                0, lambda g=gen, q=query, c=combined, m=mode: deliver_search_results(g, q, c, m)
+            )
 
-    try:
-        fuzzy_raw = search_fuzzy_backend(query, filtered_data, 10)
-    except Exception:
-        fuzzy_raw = []
 
-    try:
-        tfidf_raw = search_tfidf_backend(query, filtered_data, 10)
-    except Exception:
-        tfidf_raw = []
+def _publisher(gen, query):
+    """Early results of a running search, shown through root.after."""
 
-    try:
-        embed_raw = search_embed_backend(query, filtered_data, 10)
-    except Exception:
-        embed_raw = []
+    def publish(partial):
+        if root is not None and not is_stale_search(gen):
+            root.after(0, lambda: deliver_search_results(gen, query, partial, "partial"))
 
-    fuzzy_map = {i.get("filename", ""): float(i.get("score", 0.0)) for i in fuzzy_raw}
-    tfidf_map = {i.get("filename", ""): float(i.get("score", 0.0)) for i in tfidf_raw}
-    embed_map = {i.get("filename", ""): float(i.get("score", 0.0)) for i in embed_raw}
+    return publish
 
-    combined = merge_results(fuzzy_raw, tfidf_raw, embed_raw, filtered_data, query)
 
-    try:
-        combined = apply_feedback(combined)
-    except Exception:
-        pass
+def compute_search_results(gen, query, mask, regex=False, publish=None):
+    """Cached or fresh results; None if a newer search superseded this one
+    or a regex scan ran past its deadline."""
+    key = ("regex" if regex else "text", query, _mask_key(mask))
+    generation = index_generation
+    combined = result_cache.lookup(key, generation)
+    if combined is None:
+        if regex:
+            deadline = time.perf_counter() + BACKEND_DEADLINES["regex"]
+            combined = search_regex_backend(
+                query, DATA, RESULT_LIMIT, mask=mask,
+                should_stop=lambda: is_stale_search(gen) or time.perf_counter() > deadline,
+            )
+            if combined is None and not is_stale_search(gen):
+                show_notification("⚠ Regex search timed out, try a narrower pattern", "orange")
+        else:
+            combined = run_search_backends(
+                query, mask, stale=lambda: is_stale_search(gen), publish=publish
+            )
+        if combined is None:
+            return None
+        if not any(r.get("late_backends") for r in combined):
+            result_cache.store(key, generation, combined)
+    return combined
 
-    for item in combined:
-        fn = item.get("filename", "")
-        item["fuzzy_score"] = fuzzy_map.get(fn, 0.0)
-        item["tfidf_score"] = tfidf_map.get(fn, 0.0)
-        item["embed_score"] = embed_map.get(fn, 0.0)
-        if "tags" not in item or not isinstance(item["tags"], list):
-            item["tags"] = []
+
+def deliver_search_results(gen, query, combined, mode="full"):
+    """UI thread: show results unless a newer search was started meanwhile."""
+    global last_results, last_query
+    if is_stale_search(gen):
+        return
+
+    if mode in ("prefix", "partial"):
+        last_results = combined
+        last_query = query.strip()
+        # per keystroke: no popup, it would take focus from the search box
+        display_results(apply_sort_order(combined), last_query, notify=False, gen=gen)
+        if progress_label is not None:
+            if mode == "prefix":
+                progress_label.configure(text="Press Enter for full search")
+            else:
+                progress_label.configure(text=f"Refining results: {last_query}")
+        return
 
     save_recent_search_with_results(query, combined)
 
-    display_results(combined, query)
+    last_results = combined
+    last_query = query
+    display_results(apply_sort_order(combined), query, gen=gen)
     show_notification("✅ Search complete", "lightgreen")
 
     if progress_label is not None:
-
-        def _done():
+        late = combined[0].get("late_backends") if combined else None
+        if late:
+            progress_label.configure(text=f"Search complete (timed out: {', '.join(late)})")
+        else:
             progress_label.configure(text="Search complete")
-
-        root.after(0, _done)
-
     if progress_bar is not None and progress_var is not None:
         progress_var.set(100)
         progress_bar.set(1.0)
@@ -1458,6 +2334,99 @@ def threaded_search():
     search_query()
 
 
+def typeahead_results(query, mask=None, top_n=PAGE_SIZE):
+    """
+    Answer a partly typed query from the term prefix index: every finished
+    word must occur in a doc and the word being typed may be any term it
+    starts. When the query only grew since the last keystroke, the previous
+    candidates are narrowed instead of starting over. Candidates are ranked
+    by TF-IDF over the finished words plus the commonest completions, with
+    filename hits first.
+    """
+    global _typeahead_state
+    tokens = tokenize(query)
+    if not tokens or phrase_index.n != len(DATA):
+        return []
+    open_prefix = not query[-1].isspace()
+    constraints = [(t, False) for t in tokens[:-1]] + [(tokens[-1], open_prefix)]
+
+    key = (_mask_key(mask), index_generation)
+    prev = _typeahead_state
+    if prev is not None and prev[1] == key and query.startswith(prev[0]):
+        cands = prev[2]
+        start = max(len(tokenize(prev[0])) - 1, 0)
+    else:
+        cands = np.flatnonzero(mask) if mask is not None else np.arange(len(DATA))
+        start = 0
+    for tok, is_prefix in constraints[start:]:
+        if cands.size == 0:
+            break
+        cands = cands[phrase_index.term_docs(tok, prefix=is_prefix)[cands]]
+    _typeahead_state = (query, key, cands)
+
+    results, seen = [], set()
+    words = tokens[:-1] + (phrase_index.expand(tokens[-1]) if open_prefix else tokens[-1:])
+
+    def add(i, score, info):
+        if i in seen or len(results) >= top_n:
+            return
+        seen.add(i)
+        item = DATA[i]
+        results.append(
+            {
+                "index": int(i),
+                "filename": item.get("filename", ""),
+                "path": item.get("path", ""),
+                "text": item.get("text", ""),
+                "score": float(score),
+                "match_info": info,
+                "tags": item.get("tags", []),
+                "match_spans": phrase_index.term_spans(int(i), words),
+            }
+        )
+
+    for r in search_filename_backend(query.strip(), DATA, top_n, mask=mask):
+        add(r["index"], r["score"], "Filename match")
+
+    if cands.size:
+        cand_mask = np.zeros(len(DATA), dtype=bool)
+        cand_mask[cands] = True
+        for r in tfidf_engine.query(" ".join(words), top_k=top_n, mask=cand_mask):
+            add(r["index"], r["score"] * 100, "Prefix match")
+        for i in cands[:top_n]:
+            add(int(i), 0.0, "Prefix match")
+    return results
+
+
+def on_search_keystroke(event=None):
+    """Debounced search-as-you-type; Return runs the full search."""
+    global _typeahead_after
+    if root is None or search_entry is None:
+        return
+    keysym = getattr(event, "keysym", "")
+    if keysym in ("Return", "KP_Enter"):
+        threaded_search()
+        return
+    if keysym in TYPEAHEAD_IGNORED_KEYS:
+        return
+    if _typeahead_after is not None:
+        root.after_cancel(_typeahead_after)
+    _typeahead_after = root.after(TYPEAHEAD_DEBOUNCE_MS, _run_typeahead)
+
+
+def _run_typeahead():
+    global _typeahead_after
+    _typeahead_after = None
+    query = search_entry.get()
+    if len(query.strip()) < 2 or not DATA or regex_mode_enabled():
+        return
+    # the full search for this text is queued, running or shown already
+    if _last_full_search == (query.strip(), search_generation):
+        return
+    mask = filtered_mask if filtered_mask is not None and len(filtered_mask) == len(DATA) else None
+    submit_search(query.lstrip(), mask, mode="prefix")
+
+
 def on_recent_search_select(choice):
     if not choice:
         return
@@ -1468,6 +2437,11 @@ def on_recent_search_select(choice):
     except Exception:
         pass
 
+    if DATA:
+        # re-run against the current index and filters; repeats hit result_cache
+        threaded_search()
+        return
+
     cached = load_recent_results_for_query(choice)
     if cached:
         show_notification(f"📂 Showing recent results for: {choice}", "lightblue")
@@ -1479,84 +2453,189 @@ def on_recent_search_select(choice):
 
 
 # ------------------ Duplicate Finder Logic ------------------
+def minhash_signatures(data_list, words_of):
+    """
+    (n, NUM_PERM) MinHash signatures of data_list. Signatures are cached in
+    the store per document, so only new or changed docs are hashed.
+    """
+    db = get_store()
+    db_ids = [d.get("db_id") for d in data_list]
+    cached = {}
+    try:
+        cached = db.load_signatures(minhasher.kind, [i for i in db_ids if i is not None])
+    except Exception as e:
+        print("Signature cache read failed:", e)
+
+    sigs = np.empty((len(data_list), minhasher.num_perm), dtype=np.uint32)
+    fresh = {}
+    for i, db_id in enumerate(db_ids):
+        blob = cached.get(db_id)
+        if blob is not None and len(blob) == sigs.shape[1] * 4:
+            sigs[i] = np.frombuffer(blob, dtype=np.uint32)
+            continue
+        sigs[i] = minhasher.signature(words_of(i))
+        if db_id is not None:
+            fresh[db_id] = sigs[i].tobytes()
+    if fresh:
+        try:
+            db.save_signatures(minhasher.kind, fresh)
+        except Exception as e:
+            print("Signature cache write failed:", e)
+    return sigs
+
+
 def compute_duplicate_groups(data_list, sim_threshold=0.95):
     """
     Similar-content based duplicate finder.
     Uses Jaccard similarity on cleaned text.
     sim_threshold ~ 0.95 means 95%+ similar content treated as duplicate.
+    Candidate pairs come from MinHash / LSH banding (duplicate_engine);
+    only those get the exact Jaccard check.
     """
-    n = len(data_list)
-    if n < 2:
+    if len(data_list) < 2:
         return []
 
-    cleaned = []
-    for d in data_list:
-        txt = clean_text(d.get("text", "") or "")
-        words = set(txt.split()) if txt else set()
-        size = d.get("size_bytes") or 0
-        cleaned.append({"words": words, "size": int(size)})
-
-    parent = list(range(n))
-
-    def find(x):
-        while parent[x] != x:
-            parent[x] = parent[parent[x]]
-            x = parent[x]
-        return x
-
-    def union(a, b):
-        ra, rb = find(a), find(b)
-        if ra != rb:
-            parent[rb] = ra
-
-    for i in range(n):
-        wi = cleaned[i]["words"]
-        if not wi:
-            continue
-        for j in range(i + 1, n):
-            wj = cleaned[j]["words"]
-            if not wj:
-                continue
-
-            inter = len(wi & wj)
-            uni = len(wi | wj)
-            if uni == 0:
-                sim = 0.0
-            else:
-                sim = inter / uni
+    words = {}
 
-            if sim < 1.0:
-                if inter < max(1, int(0.3 * min(len(wi), len(wj)))):
-                    continue
+    def words_of(i):
+        w = words.get(i)
+        if w is None:
+            txt = clean_text(data_list[i].get("text", "") or "")
+            w = words[i] = set(txt.split()) if txt else set()
+        return w
 
-            if sim >= sim_threshold:
-                union(i, j)
+    sigs = minhash_signatures(data_list, words_of)
+    groups = find_duplicate_groups(sigs, words_of, threshold=sim_threshold)
+    return [[data_list[i] for i in g] for g in groups]
 
-    groups_map = {}
-    for i in range(n):
-        root_id = find(i)
-        groups_map.setdefault(root_id, []).append(i)
 
-    groups = []
-    for root_id, idx_list in groups_map.items():
-        if len(idx_list) >= 2:
-            group_items = [data_list[idx] for idx in idx_list]
-            groups.append(group_items)
+def visual_hashes(data_list):
+    """
+    64-bit dHash per item (None for non-images). Hashes are stored at ingest;
+    images indexed before that are hashed here once and cached.
+    """
+    db = get_store()
+    db_ids = [d.get("db_id") for d in data_list]
+    cached = {}
+    try:
+        cached = db.load_signatures(DHASH_KIND, [i for i in db_ids if i is not None])
+    except Exception as e:
+        print("Signature cache read failed:", e)
 
-    return groups
+    hashes, fresh = [], {}
+    for d, db_id in zip(data_list, db_ids):
+        blob = cached.get(db_id)
+        if blob is not None:
+            hashes.append(int.from_bytes(blob, "big"))
+            continue
+        h = None
+        if os.path.splitext(d.get("filename", "") or "")[1].lower() in IMAGE_EXTS:
+            try:
+                h = dhash_file(d.get("path", ""))
+            except Exception as e:
+                print(f"dHash error ({d.get('path', '')}): {e}")
+        if h is not None and db_id is not None:
+            fresh[db_id] = h.to_bytes(8, "big")
+        hashes.append(h)
+    if fresh:
+        try:
+            db.save_signatures(DHASH_KIND, fresh)
+        except Exception as e:
+            print("Signature cache write failed:", e)
+    return hashes
 
 
-def show_duplicate_window(groups):
+def compute_visual_duplicate_groups(data_list, radius=VISUAL_DUP_RADIUS):
+    """
+    Pixel-level near-duplicates: images whose dHashes differ in at most
+    `radius` bits, found with a multi-index hash table
+    (duplicate_engine.MultiIndexHash). Works for images without text.
+    """
+    if len(data_list) < 2:
+        return []
+    groups = visual_duplicate_groups(visual_hashes(data_list), radius)
+    return [[data_list[i] for i in g] for g in groups]
+
+
+def compute_exact_duplicate_groups(data_list):
+    """
+    Byte-identical files. Sizes come from a fresh stat, so files only get
+    read when another file has the same size (first 64 KB, then in full
+    if the heads match). Full-file digests are cached with the size and
+    mtime they were taken at. Files that are gone are left out.
+    """
+    if len(data_list) < 2:
+        return []
+    db = get_store()
+    db_ids = [d.get("db_id") for d in data_list]
+    cached = {}
+    try:
+        cached = db.load_signatures(DIGEST_KIND, [i for i in db_ids if i is not None])
+    except Exception as e:
+        print("Signature cache read failed:", e)
+
+    # files / stamps / digests are indexed by position in `present`
+    present, files, stamps, digests = [], [], [], {}
+    for i, d in enumerate(data_list):
+        path = d.get("path", "") or ""
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamp = struct.pack("<qd", st.st_size, st.st_mtime)
+        blob = cached.get(db_ids[i])
+        if blob is not None and blob[20:] == stamp:
+            digests[len(files)] = blob[:20]
+        present.append(i)
+        files.append((path, st.st_size))
+        stamps.append(stamp)
+
+    known = set(digests)
+    groups = exact_duplicate_groups(files, digests)
+
+    fresh = {
+        db_ids[present[j]]: d + stamps[j]
+        for j, d in digests.items()
+        if j not in known and db_ids[present[j]] is not None
+    }
+    if fresh:
+        try:
+            db.save_signatures(DIGEST_KIND, fresh)
+        except Exception as e:
+            print("Signature cache write failed:", e)
+    return [[data_list[present[j]] for j in g] for g in groups]
+
+
+# mode -> (finder, footer note)
+DUPLICATE_MODES = {
+    "Text": (
+        compute_duplicate_groups,
+        "Note: Duplicates are detected based on high content similarity "
+        "(text Jaccard similarity ≥ 95%).",
+    ),
+    "Visual": (
+        compute_visual_duplicate_groups,
+        "Note: Images are grouped when they look nearly identical "
+        f"(perceptual dHash differs in ≤ {VISUAL_DUP_RADIUS} of 64 bits).",
+    ),
+    "Exact": (
+        compute_exact_duplicate_groups,
+        "Note: Files are grouped only when they are byte-for-byte identical "
+        "(same size and same BLAKE2 hash of the whole file).",
+    ),
+}
+
+
+def show_duplicate_window(groups, mode="Text"):
     global root
     if root is None:
         return
 
     if not groups:
         show_notification("✅ No strong duplicates / near-duplicates found", "lightgreen")
-        return
 
     win = ctk.CTkToplevel(root)
-    win.title("Duplicate Finder")
+    win.title(f"Duplicate Finder - {mode}")
     win.geometry("900x600")
     win.resizable(True, True)
     win.attributes("-topmost", True)
@@ -1569,16 +2648,31 @@ def show_duplicate_window(groups):
     except Exception:
         pass
 
-    win.grid_rowconfigure(0, weight=1)
+    win.grid_rowconfigure(1, weight=1)
     win.grid_columnconfigure(0, weight=1)
 
+    def switch_mode(choice):
+        if choice != mode:
+            win.destroy()
+            run_duplicate_finder(choice)
+
+    mode_switch = ctk.CTkSegmentedButton(
+        win, values=list(DUPLICATE_MODES), command=switch_mode
+    )
+    mode_switch.set(mode)
+    mode_switch.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="w")
+
     frame = ctk.CTkScrollableFrame(win, corner_radius=10)
-    frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+    frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
     frame.grid_columnconfigure(0, weight=1)
 
     header_lbl = ctk.CTkLabel(
         frame,
-        text=f"Found {len(groups)} duplicate groups",
+        text=(
+            f"Found {len(groups)} duplicate groups"
+            if groups
+            else "No strong duplicates / near-duplicates found"
+        ),
         font=("Segoe UI Semibold", 14),
     )
     header_lbl.grid(row=0, column=0, padx=8, pady=(4, 8), sticky="w")
@@ -1635,10 +2729,7 @@ def show_duplicate_window(groups):
 
     footer = ctk.CTkLabel(
         frame,
-        text=(
-            "Note: Duplicates are detected based on high content similarity "
-            "(text Jaccard similarity ≥ 95%)."
-        ),
+        text=DUPLICATE_MODES[mode][1],
         font=("Segoe UI", 9),
         text_color=("gray25", "gray70"),
         wraplength=820,
@@ -1647,7 +2738,13 @@ def show_duplicate_window(groups):
     footer.grid(row=row_idx, column=0, padx=8, pady=(8, 6), sticky="w")
 
 
-def run_duplicate_finder():
+def run_duplicate_finder(mode=None):
+    """mode: a DUPLICATE_MODES key; defaults to the last one used."""
+    global duplicate_mode
+    mode = mode if mode in DUPLICATE_MODES else duplicate_mode
+    duplicate_mode = mode
+    finder = DUPLICATE_MODES[mode][0]
+
     if not DATA:
         show_notification("⚠ Load a folder first before finding duplicates", "orange")
         return
@@ -1675,12 +2772,13 @@ def run_duplicate_finder():
         return
 
     show_notification(
-        f"🔍 Finding duplicates in {len(base_list)} matching files...", "lightblue"
+        f"🔍 Finding duplicates ({mode.lower()}) in {len(base_list)} matching files...",
+        "lightblue",
     )
 
     def worker():
         try:
-            groups = compute_duplicate_groups(base_list, sim_threshold=0.95)
+            groups = finder(base_list)
         except Exception as e:
             print("Duplicate finder error:", e)
             traceback.print_exc()
@@ -1694,13 +2792,11 @@ def run_duplicate_finder():
             return
 
         def _ui():
+            show_duplicate_window(groups, mode)
             if groups:
-                show_duplicate_window(groups)
                 show_notification(
                     f"✅ Found {len(groups)} duplicate groups", "lightgreen"
                 )
-            else:
-                show_duplicate_window([])
 
         root.after(0, _ui)
 
@@ -1746,31 +2842,33 @@ def load_folder(folder=None, lang="eng"):
         root.after(0, _update)
 
     def process_folder():
-        json_path = get_folder_json_path(folder)
+        global column_store, loaded_folder, search_generation
         new_data = []
         loaded_from_cache = False
 
         try:
-            if os.path.exists(json_path):
-                new_data = load_data_json(json_path)
+            db = get_store()
+            plan = db.plan_reindex(folder)
+            if plan["mode"] == "cached":
+                tag_journal.compact()
                 loaded_from_cache = True
             else:
+                todo = plan["added"] + plan["changed"]
                 try:
-                    new_data = extract_text_from_folder(folder, lang, progress_callback)
+                    new_data = extract_text_from_folder(
+                        folder, lang, progress_callback, files=todo
+                    )
                 except TypeError:
                     new_data = extract_text_from_folder(folder, lang)
 
+                stats = {os.path.abspath(e[0]): e for e in plan["entries"]}
                 for item in new_data:
                     p = item.get("path", "")
-                    if os.path.exists(p):
-                        try:
-                            item["created_time"] = os.path.getctime(p)
-                            item["modified_time"] = os.path.getmtime(p)
-                            item["size_bytes"] = os.path.getsize(p)
-                        except Exception:
-                            item["created_time"] = None
-                            item["modified_time"] = None
-                            item["size_bytes"] = None
+                    e = stats.get(os.path.abspath(p))
+                    if e is not None:
+                        item["size_bytes"] = e[1]
+                        item["modified_time"] = e[2]
+                        item["created_time"] = e[3]
                     else:
                         item["created_time"] = None
                         item["modified_time"] = None
@@ -1778,22 +2876,46 @@ def load_folder(folder=None, lang="eng"):
 
                     if "tags" not in item or not isinstance(item["tags"], list):
                         item["tags"] = []
-
-                save_data_json(new_data, json_path)
+                    if p in plan["stored_paths"]:
+                        item["replaces"] = plan["stored_paths"][p]
+
+                if plan["mode"] == "full":
+                    db.replace_root(folder, new_data)
+                else:
+                    tag_journal.compact()
+                    db.apply_root_changes(folder, new_data, plan["removed"])
+                db.save_signatures(DHASH_KIND, {
+                    item["db_id"]: item["dhash"].to_bytes(8, "big")
+                    for item in new_data
+                    if item.get("dhash") is not None and item.get("db_id") is not None
+                })
+                db.update_catalog(folder, plan["entries"], plan["fingerprint"])
+            new_cols, new_data = open_root_documents(db, folder)
         except Exception as e:
             print("Error during folder processing:", e)
             traceback.print_exc()
             show_notification("❌ Error processing folder (see console)", "red")
             return
 
+        with _search_cond:
+            search_generation += 1  # searches over the old DATA are now stale
+        old_cols, column_store = column_store, new_cols
+        loaded_folder = folder
         DATA.clear()
         DATA.extend(new_data)
+        if old_cols is not None and old_cols is not new_cols:
+            old_cols.close()
         ensure_tags_field()
-        fit_tfidf_engine()
+        build_search_indexes()
 
         def _final_ui():
             if loaded_from_cache:
                 msg = f"📂 Loaded cached data ({len(DATA)} files)"
+            elif plan["mode"] == "incremental":
+                msg = (
+                    f"🔄 Index updated: +{len(plan['added'])} "
+                    f"~{len(plan['changed'])} -{len(plan['removed'])} ({len(DATA)} files)"
+                )
             else:
                 msg = f"✅ Folder processed ({len(DATA)} files)"
             show_notification(msg, "lightgreen")
@@ -1855,7 +2977,8 @@ def open_main_app():
     global root, folder_entry, search_entry, result_frame, folder_dropdown
     global progress_var, progress_label, progress_bar
     global ext_dropdown, date_filter_dropdown, size_filter_dropdown
-    global filtered_data, recent_dropdown, tag_filter_dropdown
+    global filtered_data, filtered_mask, recent_dropdown, tag_filter_dropdown
+    global sort_dropdown, regex_mode_var
     global CURRENT_USER
 
     # purana login UI hata do
@@ -1973,6 +3096,7 @@ def open_main_app():
         width=SIDEBAR_WIDTH - 90,
     )
     search_entry.grid(row=0, column=1, sticky="ew")
+    search_entry.bind("<KeyRelease>", on_search_keystroke)
 
     filter_row = ctk.CTkFrame(search_card, fg_color="transparent")
     filter_row.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(2, 8))
@@ -1995,6 +3119,15 @@ def open_main_app():
     )
     search_btn.grid(row=0, column=1, sticky="e")
 
+    regex_mode_var = tk.BooleanVar(value=False)
+    regex_cb = ctk.CTkCheckBox(
+        search_card,
+        text="Regex mode (e.g. INV-\\d+)",
+        variable=regex_mode_var,
+        font=("Segoe UI", 10),
+    )
+    regex_cb.grid(row=2, column=0, columnspan=2, padx=10, pady=(0, 8), sticky="w")
+
     # ADVANCED FILTERS
     sec_filters = ctk.CTkLabel(
         sidebar_content,
@@ -2056,6 +3189,27 @@ def open_main_app():
         row=2, column=0, columnspan=2, padx=10, pady=(0, 8), sticky="ew"
     )
 
+    sort_label = ctk.CTkLabel(
+        adv_card,
+        text="Sort results",
+        font=("Segoe UI", 10),
+        text_color=("gray25", "gray70"),
+    )
+    sort_label.grid(row=3, column=0, columnspan=2, padx=10, pady=(2, 0), sticky="w")
+
+    sort_dropdown = ctk.CTkComboBox(
+        adv_card,
+        values=SORT_OPTIONS,
+        state="readonly",
+        height=30,
+        width=SIDEBAR_WIDTH - 60,
+        command=on_sort_change,
+    )
+    sort_dropdown.set("Relevance")
+    sort_dropdown.grid(
+        row=4, column=0, columnspan=2, padx=10, pady=(0, 8), sticky="ew"
+    )
+
     # TOOLS
     tools_label = ctk.CTkLabel(
         sidebar_content,
@@ -2339,9 +3493,12 @@ def open_main_app():
     globals()["date_filter_dropdown"] = date_filter_dropdown
     globals()["size_filter_dropdown"] = size_filter_dropdown
     globals()["tag_filter_dropdown"] = tag_filter_dropdown
+    globals()["sort_dropdown"] = sort_dropdown
+    globals()["regex_mode_var"] = regex_mode_var
     globals()["recent_dropdown"] = recent_dropdown
 
     filtered_data = []
+    filtered_mask = None
 
     show_notification("👋 Welcome to SmartShotApp (Desktop)", "lightgreen")
     refresh_recent_dropdown()
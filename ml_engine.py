@@ -7,49 +7,90 @@ class TFIDFEngine:
     def __init__(self):
         self.vectorizer = None
         self.doc_vectors = None
+        self.term_vectors = None
         self.documents = []
 
-    def fit(self, data):
+    def fit(self, data, texts=None):
         """
         data: list of {"filename","path","text"}
+        texts: optional clean_text() of each doc, if the caller already has it
         """
-        texts = [clean_text(item.get("text","")) for item in data]
+        if texts is None:
+            texts = [clean_text(item.get("text","")) for item in data]
         self.documents = data
         if not texts or all(t=="" for t in texts):
             self.vectorizer = None
             self.doc_vectors = None
+            self.term_vectors = None
             return
         self.vectorizer = TfidfVectorizer().fit(texts)
         self.doc_vectors = self.vectorizer.transform(texts)
+        # term -> docs postings, so a query only touches docs sharing its terms
+        self.term_vectors = self.doc_vectors.T.tocsr()
 
-    def query(self, query_text, top_k=10):
+    def query(self, query_text, top_k=10, mask=None):
+        """
+        mask: optional bool array over doc IDs (positions in fitted data);
+        docs outside the mask are never scored.
+        """
         if self.vectorizer is None or self.doc_vectors is None:
             return []
 
         q = clean_text(query_text)
         q_vec = self.vectorizer.transform([q])
-        sims = cosine_similarity(q_vec, self.doc_vectors)[0]
+        if q_vec.nnz == 0:
+            return []
+
+        # rows are L2-normalised, so cosine == dot product over query terms
+        sims = np.asarray(self.term_vectors[q_vec.indices].T @ q_vec.data).ravel()
+        if mask is not None:
+            sims = np.where(mask, sims, 0.0)
+
+        candidates = np.flatnonzero(sims > 0)
+        if candidates.size > top_k:
+            part = np.argpartition(sims[candidates], -top_k)[-top_k:]
+            candidates = candidates[part]
+        idx_sorted = candidates[np.argsort(sims[candidates])[::-1]]
 
-        idx_sorted = np.argsort(sims)[::-1][:top_k]
         results = []
         for i in idx_sorted:
-            if sims[i]>0:
-                results.append({
-                    "filename": self.documents[i]["filename"],
-                    "path": self.documents[i]["path"],
-                    "score": float(sims[i]),
-                    "text": self.documents[i]["text"]
-                })
+            results.append({
+                "index": int(i),
+                "filename": self.documents[i]["filename"],
+                "path": self.documents[i]["path"],
+                "score": float(sims[i]),
+                "text": self.documents[i]["text"]
+            })
         return results
 
+    def overlap(self, query_text, mask=None):
+        """
+        Number of distinct query words each doc contains, read from the
+        term postings (no doc text is touched). Returns (doc IDs, counts).
+        """
+        if self.vectorizer is None or self.term_vectors is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        vocab = self.vectorizer.vocabulary_
+        terms = sorted({vocab[w] for w in clean_text(query_text).split() if w in vocab})
+        if not terms:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        counts = np.asarray((self.term_vectors[terms] > 0).sum(axis=0)).ravel()
+        if mask is not None:
+            counts = np.where(mask, counts, 0)
+        ids = np.flatnonzero(counts)
+        return ids, counts[ids].astype(float)
+
 # Optional: Embedding search helper
-def search_embeddings_engine(query, data, top_k=10, threshold=0.6):
-    embeddings = get_embeddings([item["text"] for item in data])
+def search_embeddings_engine(query, data, top_k=10, threshold=0.6, mask=None):
+    ids = np.arange(len(data)) if mask is None else np.flatnonzero(mask)
+    if ids.size == 0:
+        return []
+    embeddings = get_embeddings([data[i]["text"] for i in ids])
     query_emb = get_embeddings([query])
     sims = cosine_similarity(query_emb, embeddings)[0]
     results = []
-    for i, s in enumerate(sims):
+    for j, s in enumerate(sims):
         if s >= threshold:
-            results.append({**data[i], "similarity": float(s)})
+            results.append({**data[ids[j]], "index": int(ids[j]), "similarity": float(s)})
     results.sort(key=lambda x:x.get("similarity",0), reverse=True)
     return results[:top_k]
@@ -3,6 +3,7 @@ from PIL import Image
 import os
 import fitz  # PyMuPDF
 from nlp_engine import clean_text
+from duplicate_engine import dhash_file
 
 # Windows users ke liye agar path alag ho to uncomment karo
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -44,39 +45,59 @@ def extract_text_from_txt(file_path):
     except:
         return ""
 
-def extract_text_from_folder(folder_path, lang="eng", progress_callback=None):
+SUPPORTED_IMAGES = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+
+def extract_text_from_file(full_path, lang="eng"):
+    """
+    Text of one file by extension; "" for unsupported types.
+    """
+    file = os.path.basename(full_path)
+    if file.lower().endswith(SUPPORTED_IMAGES):
+        img = Image.open(full_path)
+        return pytesseract.image_to_string(img, lang=lang)
+    elif file.lower().endswith(".pdf"):
+        return extract_text_from_pdf(full_path)
+    elif file.lower().endswith(".docx"):
+        return extract_text_from_docx(full_path)
+    elif file.lower().endswith(".txt"):
+        return extract_text_from_txt(full_path)
+    return ""
+
+def extract_text_from_folder(folder_path, lang="eng", progress_callback=None, files=None):
     """
     Extract text from images + PDF + DOCX + TXT.
     progress_callback(index, total) can be passed to update GUI progress.
+    files: optional list of paths to process instead of walking the folder
+    (incremental reindex).
     """
-    supported_images = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
     extracted_data = []
 
-    all_files = []
-    for root_dir, dirs, files in os.walk(folder_path):
-        for file in files:
-            all_files.append(os.path.join(root_dir, file))
+    if files is not None:
+        all_files = list(files)
+    else:
+        all_files = []
+        for root_dir, dirs, names in os.walk(folder_path):
+            for file in names:
+                all_files.append(os.path.join(root_dir, file))
 
     total_files = len(all_files)
     for idx, full_path in enumerate(all_files, start=1):
         file = os.path.basename(full_path)
-        text = ""
         try:
-            if file.lower().endswith(supported_images):
-                img = Image.open(full_path)
-                text = pytesseract.image_to_string(img, lang=lang)
-            elif file.lower().endswith(".pdf"):
-                text = extract_text_from_pdf(full_path)
-            elif file.lower().endswith(".docx"):
-                text = extract_text_from_docx(full_path)
-            elif file.lower().endswith(".txt"):
-                text = extract_text_from_txt(full_path)
+            text = extract_text_from_file(full_path, lang)
 
-            extracted_data.append({
+            record = {
                 "filename": file,
                 "path": full_path,
                 "text": text.strip()
-            })
+            }
+            if file.lower().endswith(SUPPORTED_IMAGES):
+                # perceptual hash for the visual duplicate finder
+                try:
+                    record["dhash"] = dhash_file(full_path)
+                except Exception as e:
+                    print(f"dHash error ({file}): {e}")
+            extracted_data.append(record)
 
         except Exception as e:
             print(f"Error processing {file}: {e}")
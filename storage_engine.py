@@ -1,6 +1,18 @@
+import hashlib
 import json
+import mmap
+import ntpath
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
 
+import numpy as np
+
 def save_data_json(data, filepath):
     """
     data: list of dicts (filename, path, text)
@@ -16,3 +28,1138 @@ def load_data_json(filepath):
         return []
     with open(p, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+# ------------------ SQLite store ------------------
+# data_storage/*.json files that are app state, not folder caches
+NON_FOLDER_JSON = {
+    "last_used_folder.json",
+    "used_folders.json",
+    "recent_searches.json",
+    "users.json",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    text TEXT NOT NULL DEFAULT '',  -- zlib-compressed UTF-8 (pack_text)
+    created_time REAL,
+    modified_time REAL,
+    size_bytes INTEGER,
+    UNIQUE (root, path)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_path ON documents(path);
+CREATE INDEX IF NOT EXISTS idx_documents_root ON documents(root);
+CREATE INDEX IF NOT EXISTS idx_documents_mtime ON documents(root, modified_time);
+CREATE INDEX IF NOT EXISTS idx_documents_size ON documents(root, size_bytes);
+
+CREATE TABLE IF NOT EXISTS tags (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (doc_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS recent_searches (
+    query_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    time REAL NOT NULL,
+    results TEXT NOT NULL DEFAULT '[]'
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    key TEXT PRIMARY KEY,
+    score REAL NOT NULL DEFAULT 0
+);
+
+-- one row per loaded folder: its index ID, a generation bumped on every
+-- write, and the scan stats / fingerprint it was last indexed with
+CREATE TABLE IF NOT EXISTS roots (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL UNIQUE,
+    generation INTEGER NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    newest_mtime REAL,
+    fingerprint TEXT,
+    indexed_at REAL
+);
+
+-- per-document fingerprints (e.g. MinHash signatures), dropped whenever the
+-- document's text or file stats change
+CREATE TABLE IF NOT EXISTS signatures (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    sig BLOB NOT NULL,
+    PRIMARY KEY (doc_id, kind)
+);
+CREATE TRIGGER IF NOT EXISTS signatures_stale AFTER UPDATE OF text, modified_time, size_bytes ON documents BEGIN
+    DELETE FROM signatures WHERE doc_id = old.id;
+END;
+
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    mtime REAL,
+    imported_at REAL
+);
+"""
+
+# contentless: the index keeps no second copy of the text; the triggers feed
+# it the decompressed text through unzip_text(), registered per connection
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    filename, text, content=''
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, filename, text)
+    VALUES (new.id, new.filename, unzip_text(new.text));
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, filename, text)
+    VALUES ('delete', old.id, old.filename, unzip_text(old.text));
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF filename, text ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, filename, text)
+    VALUES ('delete', old.id, old.filename, unzip_text(old.text));
+    INSERT INTO documents_fts(rowid, filename, text)
+    VALUES (new.id, new.filename, unzip_text(new.text));
+END;
+"""
+
+DROP_FTS = """
+DROP TRIGGER IF EXISTS documents_ai;
+DROP TRIGGER IF EXISTS documents_ad;
+DROP TRIGGER IF EXISTS documents_au;
+DROP TABLE IF EXISTS documents_fts;
+"""
+
+# PRAGMA user_version; 1: documents.text compressed, contentless FTS5
+SCHEMA_VERSION = 1
+
+
+def pack_text(text):
+    return zlib.compress((text or "").encode("utf-8"), 6)
+
+
+def unpack_text(value):
+    """Text of a stored documents.text; rows from older versions hold plain TEXT."""
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+
+def normalize_root(folder):
+    """Key a loaded folder is stored under: absolute, normalized, case-folded where the OS is."""
+    return os.path.normcase(os.path.abspath(folder or "."))
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"Could not remove {path}:", e)
+
+
+def _split_path(path):
+    # cached paths may be Windows paths even when we run elsewhere
+    return ntpath if "\\" in (path or "") else os.path
+
+
+def scan_folder(folder):
+    """[(path, size, mtime, ctime)] for every file extraction would visit."""
+    entries = []
+    for root_dir, dirs, files in os.walk(folder):
+        for file in files:
+            p = os.path.join(root_dir, file)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((p, st.st_size, st.st_mtime, st.st_ctime))
+    return entries
+
+
+def folder_fingerprint(folder, entries):
+    """Hash of relative path + size + mtime of every file; ctime is ignored."""
+    h = hashlib.sha1()
+    for p, size, mtime, _ in sorted(entries):
+        rel = os.path.relpath(p, folder)
+        h.update(f"{rel}\0{size}\0{mtime!r}\n".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+class SQLiteStore:
+    """
+    Documents, tags, recent searches and feedback in one SQLite file.
+    Documents are grouped by `root` (the folder that was loaded) and
+    mirrored into an FTS5 index when the SQLite build has it.
+    One connection shared across threads, serialized by a lock.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function("unzip_text", 1, unpack_text, deterministic=True)
+        self.has_fts = False
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self.conn.executescript(SCHEMA)
+            shrunk = self._migrate()
+            self._rekey_roots()
+            try:
+                existed = self.conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'documents_fts'"
+                ).fetchone()
+                self.conn.executescript(FTS_SCHEMA)
+                if not existed:
+                    # documents stored while the index was missing
+                    self.conn.execute(
+                        "INSERT INTO documents_fts(rowid, filename, text) "
+                        "SELECT id, filename, unzip_text(text) FROM documents"
+                    )
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                print("FTS5 not available, full-text index disabled:", e)
+            self.conn.commit()
+            if shrunk:
+                self.conn.execute("VACUUM")  # hand the space of the plain texts back once
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _migrate(self):
+        """
+        Compress the texts of a database written before SCHEMA_VERSION 1.
+        The FTS index and the signature trigger are dropped for the rewrite
+        (their per-row work would dominate it) and recreated afterwards.
+        Returns True when texts were rewritten.
+        """
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return False
+        self.conn.executescript(DROP_FTS + "DROP TRIGGER IF EXISTS signatures_stale;")
+        ids = [r["id"] for r in self.conn.execute("SELECT id FROM documents WHERE typeof(text) = 'text'")]
+        with self.conn:
+            for k in range(0, len(ids), 500):
+                chunk = ids[k:k + 500]
+                rows = self.conn.execute(
+                    f"SELECT id, text FROM documents WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE documents SET text = ? WHERE id = ?",
+                    [(pack_text(r["text"]), r["id"]) for r in rows],
+                )
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return bool(ids)
+
+    def _rekey_roots(self):
+        """Move roots stored under an older spelling to their normalize_root key."""
+        with self.conn:
+            old = {r["root"] for r in self.conn.execute("SELECT DISTINCT root FROM documents")}
+            old |= {r["root"] for r in self.conn.execute("SELECT root FROM roots")}
+            for root in old:
+                key = normalize_root(root)
+                if key == root:
+                    continue
+                # rows already stored under the new key win over the old spelling
+                self.conn.execute("UPDATE OR IGNORE documents SET root = ? WHERE root = ?", (key, root))
+                self.conn.execute("DELETE FROM documents WHERE root = ?", (root,))
+                self.conn.execute("UPDATE OR IGNORE roots SET root = ? WHERE root = ?", (key, root))
+                self.conn.execute("DELETE FROM roots WHERE root = ?", (root,))
+
+    # ---------- documents ----------
+    def has_root(self, root):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM documents WHERE root = ? LIMIT 1", (normalize_root(root),)
+            ).fetchone()
+        return row is not None
+
+    # ---------- root catalog ----------
+    def _root_id(self, root):
+        self.conn.execute("INSERT OR IGNORE INTO roots (root) VALUES (?)", (root,))
+        return self.conn.execute("SELECT id FROM roots WHERE root = ?", (root,)).fetchone()["id"]
+
+    def _bump(self, root):
+        self._root_id(root)
+        self.conn.execute("UPDATE roots SET generation = generation + 1 WHERE root = ?", (root,))
+
+    def catalog(self, root):
+        """Catalog row of a root as a dict, or None if it was never indexed."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM roots WHERE root = ?", (normalize_root(root),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def root_signature(self, root):
+        """(doc count, index ID, generation); changes whenever the root is written."""
+        root = normalize_root(root)
+        with self.lock, self.conn:
+            root_id = self._root_id(root)
+            gen = self.conn.execute(
+                "SELECT generation FROM roots WHERE id = ?", (root_id,)
+            ).fetchone()["generation"]
+            n = self.conn.execute(
+                "SELECT COUNT(*) AS n FROM documents WHERE root = ?", (root,)
+            ).fetchone()["n"]
+        return n, root_id, gen
+
+    def update_catalog(self, root, entries, fingerprint):
+        """Record the scan a root was just indexed (or verified) against."""
+        mtimes = [e[2] for e in entries]
+        with self.lock, self.conn:
+            root = normalize_root(root)
+            self._root_id(root)
+            self.conn.execute(
+                "UPDATE roots SET file_count = ?, total_bytes = ?, newest_mtime = ?, "
+                "fingerprint = ?, indexed_at = ? WHERE root = ?",
+                (
+                    len(entries),
+                    sum(e[1] for e in entries),
+                    max(mtimes) if mtimes else None,
+                    fingerprint,
+                    time.time(),
+                    root,
+                ),
+            )
+
+    def plan_reindex(self, folder):
+        """
+        Compare the folder on disk with what is stored for it.
+        Returns {"mode": "cached" | "incremental" | "full", "entries",
+        "fingerprint", "added", "changed", "removed", "stored_paths"};
+        added / changed are paths on disk, removed are stored paths and
+        stored_paths maps each changed disk path to its stored spelling.
+        A root whose files all match is re-stamped and reported as cached.
+        Rows without stored stats (legacy JSON imports) take the disk stats
+        and count as unchanged instead of being re-extracted.
+        """
+        folder = os.path.abspath(folder)
+        root = normalize_root(folder)
+        entries = scan_folder(folder)
+        fp = folder_fingerprint(folder, entries)
+        plan = {"mode": "cached", "entries": entries, "fingerprint": fp,
+                "added": [], "changed": [], "removed": [], "stored_paths": {}}
+
+        with self.lock:
+            stored = self.conn.execute(
+                "SELECT path, size_bytes, modified_time FROM documents WHERE root = ?", (root,)
+            ).fetchall()
+        if not stored:
+            plan["mode"] = "full"
+            plan["added"] = [e[0] for e in entries]
+            return plan
+
+        cat = self.catalog(root)
+        if cat and cat["fingerprint"] == fp:
+            return plan
+
+        def key(path):
+            pm = _split_path(path)
+            return pm.normcase(pm.normpath(path))
+
+        by_path = {key(r["path"]): r for r in stored}
+        backfill = []
+        for p, size, mtime, ctime in entries:
+            r = by_path.pop(key(p), None)
+            if r is None:
+                plan["added"].append(p)
+            elif r["size_bytes"] is None and r["modified_time"] is None:
+                backfill.append((size, mtime, ctime, root, r["path"]))
+            elif r["size_bytes"] != size or r["modified_time"] != mtime:
+                plan["changed"].append(p)
+                plan["stored_paths"][p] = r["path"]
+        plan["removed"] = [r["path"] for r in by_path.values()]
+
+        if backfill:
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "UPDATE documents SET size_bytes = ?, modified_time = ?, created_time = ? "
+                    "WHERE root = ? AND path = ?",
+                    backfill,
+                )
+                self._bump(root)
+
+        if plan["added"] or plan["changed"] or plan["removed"]:
+            plan["mode"] = "incremental"
+        else:
+            self.update_catalog(root, entries, fp)
+        return plan
+
+    def iter_root(self, root):
+        """Stream one root's rows (with text) without building the whole list."""
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT id AS db_id, filename, path, text, created_time, modified_time, size_bytes "
+                "FROM documents WHERE root = ? ORDER BY id",
+                (normalize_root(root),),
+            )
+            for r in cur:
+                r = dict(r)
+                r["text"] = unpack_text(r["text"])
+                yield r
+
+    def load_root_tags(self, root):
+        """{db_id: [tags]} for one root."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT t.doc_id, t.tag FROM tags t JOIN documents d ON d.id = t.doc_id "
+                "WHERE d.root = ? ORDER BY t.tag",
+                (normalize_root(root),),
+            ).fetchall()
+        tags = {}
+        for r in rows:
+            tags.setdefault(r["doc_id"], []).append(r["tag"])
+        return tags
+
+    def replace_root(self, root, data):
+        """Store a freshly extracted folder, replacing what was there."""
+        root = normalize_root(root)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM documents WHERE root = ?", (root,))
+            self._insert(root, data)
+            self._bump(root)
+
+    def apply_root_changes(self, root, data, removed_paths):
+        """
+        Incremental update of one root: rows in `data` are updated in place
+        by path (keeping their ID and tags) or inserted; removed paths are
+        deleted. An item's "replaces" names the stored path it updates when
+        it differs from its own.
+        """
+        root = normalize_root(root)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM documents WHERE root = ? AND path = ?",
+                [(root, p) for p in removed_paths],
+            )
+            new = []
+            for item in data:
+                cur = self.conn.execute(
+                    "UPDATE documents SET path = ?, filename = ?, text = ?, created_time = ?, "
+                    "modified_time = ?, size_bytes = ? WHERE root = ? AND path = ?",
+                    (
+                        item.get("path", "") or "",
+                        item.get("filename", "") or "",
+                        pack_text(item.get("text", "")),
+                        item.get("created_time"),
+                        item.get("modified_time"),
+                        item.get("size_bytes"),
+                        root,
+                        item.get("replaces") or item.get("path", "") or "",
+                    ),
+                )
+                if cur.rowcount == 0:
+                    new.append(item)
+                else:
+                    item["db_id"] = self.conn.execute(
+                        "SELECT id FROM documents WHERE root = ? AND path = ?",
+                        (root, item.get("path", "") or ""),
+                    ).fetchone()["id"]
+            self._insert(root, new)
+            self._bump(root)
+
+    def _insert(self, root, data):
+        for item in data:
+            cur = self.conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(root, path, filename, text, created_time, modified_time, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    root,
+                    item.get("path", "") or "",
+                    item.get("filename", "") or "",
+                    pack_text(item.get("text", "")),
+                    item.get("created_time"),
+                    item.get("modified_time"),
+                    item.get("size_bytes"),
+                ),
+            )
+            item["db_id"] = cur.lastrowid
+            tags = sorted(set(t for t in item.get("tags", []) or [] if t))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tags (doc_id, tag) VALUES (?, ?)",
+                [(cur.lastrowid, t) for t in tags],
+            )
+
+    # ---------- signatures ----------
+    def load_signatures(self, kind, doc_ids):
+        """{doc_id: bytes} of the cached signatures of one kind."""
+        out = {}
+        doc_ids = list(doc_ids)
+        with self.lock:
+            for k in range(0, len(doc_ids), 900):
+                chunk = doc_ids[k:k + 900]
+                rows = self.conn.execute(
+                    f"SELECT doc_id, sig FROM signatures WHERE kind = ? "
+                    f"AND doc_id IN ({','.join('?' * len(chunk))})",
+                    (kind, *chunk),
+                ).fetchall()
+                out.update((r["doc_id"], r["sig"]) for r in rows)
+        return out
+
+    def save_signatures(self, kind, sigs):
+        """sigs: {doc_id: bytes}."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO signatures (doc_id, kind, sig) VALUES (?, ?, ?)",
+                [(doc_id, kind, sqlite3.Binary(sig)) for doc_id, sig in sigs.items()],
+            )
+
+    def set_tags(self, path, tags):
+        """Point update of one file's tags (in every root that holds it)."""
+        clean = sorted(set(t for t in tags if t))
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id FROM documents WHERE path = ?", (path or "",)
+            ).fetchall()
+            for row in rows:
+                self.conn.execute("DELETE FROM tags WHERE doc_id = ?", (row["id"],))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tags (doc_id, tag) VALUES (?, ?)",
+                    [(row["id"], t) for t in clean],
+                )
+        return bool(rows)
+
+    def set_tags_many(self, tags_by_path):
+        """Apply {path: tags} in one transaction (used by TagJournal.compact)."""
+        with self.lock, self.conn:
+            for path, tags in tags_by_path.items():
+                self.set_tags(path, tags)
+
+    def fts_search(self, query, root=None, limit=50, doc_ids=None):
+        """
+        FTS5 match over filename + text, best bm25 first, optionally
+        limited to one root and to the documents with the given db ids
+        (the current filter). Every word must match; the last one may be
+        a prefix. Returns [{"db_id","path","score"}]; [] without FTS5.
+        """
+        if not self.has_fts:
+            return []
+        words = (query or "").split()
+        if not words:
+            return []
+        terms = " ".join('"' + t.replace('"', '""') + '"' for t in words) + "*"
+        sql = (
+            "SELECT d.id, d.path, bm25(documents_fts) AS rank FROM documents_fts "
+            "JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        args = [terms]
+        if root is not None:
+            sql += " AND d.root = ?"
+            args.append(normalize_root(root))
+        if doc_ids is not None:
+            sql += " AND d.id IN (SELECT value FROM json_each(?))"
+            args.append(json.dumps([int(i) for i in doc_ids]))
+        sql += " ORDER BY rank LIMIT ?"
+        args.append(limit)
+        with self.lock:
+            try:
+                rows = self.conn.execute(sql, args).fetchall()
+            except sqlite3.OperationalError as e:
+                print("FTS query failed:", e)
+                return []
+        return [{"db_id": r["id"], "path": r["path"], "score": -r["rank"]} for r in rows]
+
+    # ---------- recent searches ----------
+    def load_recent(self, limit=10):
+        """[{"query","time","results"}] newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT query, time, results FROM recent_searches ORDER BY time DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        out = []
+        for r in rows:
+            try:
+                results = json.loads(r["results"]) or []
+            except Exception:
+                results = []
+            out.append({"query": r["query"], "time": r["time"], "results": results})
+        return out
+
+    def save_recent(self, query, results, max_items=10, when=None):
+        query = (query or "").strip()
+        if not query:
+            return
+        self.save_recent_many(
+            [{"query": query, "time": when or time.time(), "results": results}], max_items
+        )
+
+    def save_recent_many(self, entries, max_items=10):
+        """Upsert several recent searches and trim to max_items in one transaction."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO recent_searches (query_key, query, time, results) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        e["query"].strip().lower(),
+                        e["query"].strip(),
+                        e["time"],
+                        json.dumps(e["results"], ensure_ascii=False),
+                    )
+                    for e in entries
+                ],
+            )
+            self.conn.execute(
+                "DELETE FROM recent_searches WHERE query_key NOT IN "
+                "(SELECT query_key FROM recent_searches ORDER BY time DESC LIMIT ?)",
+                (max_items,),
+            )
+
+    # ---------- feedback ----------
+    def add_feedback(self, key, delta):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO feedback (key, score) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET score = score + excluded.score",
+                (key, float(delta)),
+            )
+
+    def load_feedback(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT key, score FROM feedback").fetchall()
+        return {r["key"]: r["score"] for r in rows}
+
+    # ---------- legacy JSON import ----------
+    def _imported(self, source, mtime):
+        row = self.conn.execute(
+            "SELECT mtime FROM imports WHERE source = ?", (source,)
+        ).fetchone()
+        return row is not None and row["mtime"] == mtime
+
+    def _mark_imported(self, source, mtime):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO imports (source, mtime, imported_at) VALUES (?, ?, ?)",
+            (source, mtime, time.time()),
+        )
+
+    def import_legacy_json(self, data_folder, known_folders=()):
+        """
+        One-time import of the old per-folder JSON caches and
+        recent_searches.json. A cache named <basename>.json is attached to
+        the known folder with that basename, else to the common parent of
+        its paths. Roots already in the DB are left alone. Imported files
+        are deleted once their rows are committed: SQLite holds them now.
+        """
+        if not os.path.isdir(data_folder):
+            return 0
+        by_name = {}
+        for f in known_folders or []:
+            by_name.setdefault(os.path.basename(_split_path(f).normpath(f)), f)
+
+        imported = 0
+        for name in sorted(os.listdir(data_folder)):
+            full = os.path.join(data_folder, name)
+            if not name.endswith(".json") or name in NON_FOLDER_JSON:
+                continue
+            mtime = os.path.getmtime(full)
+            with self.lock:
+                done = self._imported(name, mtime)
+            if done:
+                _remove_quietly(full)  # imported by a version that kept the file
+                continue
+            try:
+                data = load_data_json(full)
+            except Exception as e:
+                print(f"Legacy import skipped ({name}):", e)
+                continue
+            if not isinstance(data, list):
+                continue
+            data = [d for d in data if isinstance(d, dict) and d.get("path")]
+
+            root = by_name.get(name[: -len(".json")])
+            if root is None and data:
+                mod = _split_path(data[0]["path"])
+                try:
+                    root = mod.commonpath([mod.dirname(d["path"]) for d in data])
+                except ValueError:
+                    root = mod.dirname(data[0]["path"])
+
+            with self.lock, self.conn:
+                if root and not self.has_root(root):
+                    self._insert(normalize_root(root), data)
+                    imported += 1
+                self._mark_imported(name, mtime)
+            if root:
+                _remove_quietly(full)
+
+        recent_file = os.path.join(data_folder, "recent_searches.json")
+        if os.path.exists(recent_file):
+            mtime = os.path.getmtime(recent_file)
+            with self.lock:
+                done = self._imported("recent_searches.json", mtime)
+            if done:
+                _remove_quietly(recent_file)
+            else:
+                try:
+                    raw = load_data_json(recent_file)
+                    cache = raw.get("cache", {}) if isinstance(raw, dict) else {}
+                    for r in reversed(raw.get("recent", []) if isinstance(raw, dict) else []):
+                        q = r.get("query")
+                        if q:
+                            self.save_recent(q, cache.get(q, []), max_items=10, when=r.get("time"))
+                    ok = True
+                except Exception as e:
+                    print("Legacy recent_searches import failed:", e)
+                    ok = False
+                with self.lock, self.conn:
+                    self._mark_imported("recent_searches.json", mtime)
+                if ok:
+                    _remove_quietly(recent_file)
+        return imported
+
+
+# ------------------ Tag edit journal ------------------
+class TagJournal:
+    """
+    Append-only log of tag edits, one JSON line per Apply.
+    append() is a single O_APPEND write + fsync, so the UI never waits on
+    the store; compact() folds the log into the store in the background
+    and atomically swaps in a log holding only what arrived meanwhile.
+    A torn last line (crash mid-append) is ignored on replay.
+    """
+
+    def __init__(self, path, apply_batch, delay=2.0):
+        self.path = path
+        self.apply_batch = apply_batch
+        self.delay = delay
+        self.lock = threading.Lock()
+        # one compaction at a time (timer vs. folder load): the offset read at
+        # the start must still describe the file when the tail is rewritten
+        self._compact_lock = threading.Lock()
+        self._timer = None
+
+    def append(self, path, tags):
+        line = json.dumps(
+            {"path": path, "tags": list(tags), "time": time.time()}, ensure_ascii=False
+        )
+        data = (line + "\n").encode("utf-8")
+        with self.lock:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.schedule_compact()
+
+    def _read(self):
+        """Complete entries in the log and the byte offset just past them."""
+        if not os.path.exists(self.path):
+            return [], 0
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        end = raw.rfind(b"\n") + 1
+        entries = []
+        for line in raw[:end].splitlines():
+            try:
+                e = json.loads(line.decode("utf-8"))
+                if isinstance(e, dict) and e.get("path"):
+                    entries.append(e)
+            except Exception:
+                continue
+        return entries, end
+
+    def compact(self):
+        with self._compact_lock:
+            with self.lock:
+                entries, offset = self._read()
+            if not entries and offset == 0:
+                return 0
+            latest = {}
+            for e in entries:
+                latest[e["path"]] = e.get("tags", [])
+            if latest:
+                self.apply_batch(latest)
+            self._drop_prefix(offset)
+            return len(latest)
+
+    def _drop_prefix(self, offset):
+        """Swap in a log holding only what was appended past `offset`."""
+        with self.lock:
+            rest = b""
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    # appends only grow the log; a shorter one was replaced
+                    # behind our back and is kept whole
+                    f.seek(0, os.SEEK_END)
+                    f.seek(offset if f.tell() >= offset else 0)
+                    rest = f.read()
+            # nothing is mid-append while we hold the lock: a torn tail is garbage
+            rest = rest[: rest.rfind(b"\n") + 1]
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(rest)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def schedule_compact(self):
+        """Coalesce bursts of edits into one background compaction."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._compact_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print("Tag journal compaction failed:", e)
+
+
+class RecentSearches:
+    """
+    Recent queries and their top results, held in memory.
+    add() only touches the dict; changed entries reach the store through a
+    coalesced background flush. Results are stored as doc references
+    (db_id, path, scores), not full texts.
+    """
+
+    REF_KEYS = (
+        "db_id", "filename", "path", "score",
+        "fuzzy_score", "tfidf_score", "embed_score", "match_info",
+    )
+
+    def __init__(self, store, max_items=10, delay=1.0):
+        self.store = store
+        self.max_items = max_items
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self._timer = None
+        self._dirty = set()
+        self.entries = OrderedDict()  # query_key -> entry, oldest first
+        for e in reversed(store.load_recent(max_items)):
+            self.entries[e["query"].strip().lower()] = e
+
+    def add(self, query, results, when=None):
+        query = (query or "").strip()
+        if not query:
+            return
+        key = query.lower()
+        refs = [{k: r.get(k) for k in self.REF_KEYS if r.get(k) is not None} for r in results]
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = {"query": query, "time": when or time.time(), "results": refs}
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+            self._dirty.add(key)
+        self.schedule_flush()
+
+    def queries(self, limit=10):
+        with self.lock:
+            return [e["query"] for e in reversed(self.entries.values())][:limit]
+
+    def results(self, query):
+        with self.lock:
+            e = self.entries.get((query or "").strip().lower())
+            return [dict(r) for r in e["results"]] if e else []
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                keys = set(self._dirty)
+                todo = [self.entries[k] for k in keys if k in self.entries]
+                self._dirty.clear()
+            if todo:
+                try:
+                    self.store.save_recent_many(todo, self.max_items)
+                except Exception:
+                    # keep them for the next flush (e.g. the DB was locked)
+                    with self.lock:
+                        self._dirty |= keys
+                    raise
+        return len(todo)
+
+    def schedule_flush(self):
+        """Coalesce a burst of searches into one write."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print("Recent searches flush failed:", e)
+
+
+# ------------------ Memory-mapped column store ------------------
+class LazyDoc(dict):
+    """
+    DATA record whose text and numeric fields live in a ColumnStore.
+    Only filename / path / tags / db_id are held in the dict; "text",
+    "size_bytes", "modified_time" and "created_time" are read from the
+    columns on access, so full texts are materialized only for the docs
+    that are actually displayed or scored. keys() / iteration / items()
+    include the lazy fields, so dict(doc) and {**doc} copy them too.
+    """
+
+    __slots__ = ("_cols", "_i")
+
+    LAZY_KEYS = ("text", "size_bytes", "modified_time", "created_time")
+
+    def __missing__(self, key):
+        if key in self.LAZY_KEYS:
+            return self._cols.field(self._i, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self.LAZY_KEYS and not dict.__contains__(self, key):
+            return self._cols.field(self._i, key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        return key in self.LAZY_KEYS or dict.__contains__(self, key)
+
+    def keys(self):
+        return list(dict.keys(self)) + [k for k in self.LAZY_KEYS if not dict.__contains__(self, k)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def copy(self):
+        return dict(self)
+
+
+class ColumnStore:
+    """
+    One loaded folder on disk, read through mmap:
+      db_id / size / mtime / ctime / ext  fixed-width .npy columns
+      text.z                              zlib blocks of ~BLOCK_SIZE raw bytes
+      block_off.npy / block_first.npy     byte offset and first doc of each block
+      text_off.npy                        raw offsets, doc i = off[i]:off[i+1]
+      meta.json                           ext table, filenames, paths (written last)
+    A doc never straddles two blocks, so one read inflates one block;
+    recently inflated blocks are kept in a small LRU.
+    After close() (a reload swapped in a newer store) text reads return "":
+    only a search still running over the old DATA can get there, and its
+    generation is already stale, so its results are never shown.
+    """
+
+    VERSION = 2
+    BLOCK_SIZE = 64 * 1024
+    CACHED_BLOCKS = 16
+
+    COLUMNS = {
+        "db_id": np.int64,
+        "size": np.int64,
+        "mtime": np.float64,
+        "ctime": np.float64,
+        "ext": np.int16,
+        "text_off": np.int64,
+        "block_off": np.int64,
+        "block_first": np.int64,
+    }
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.exts = meta["exts"]
+        self.filenames = meta["filenames"]
+        self.paths = meta["paths"]
+        self.text_bytes = meta.get("text_bytes", 0)
+        self.stored_bytes = meta.get("stored_bytes", 0)
+        self.cols = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in self.COLUMNS
+        }
+        self._file = open(os.path.join(directory, "text.z"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._text = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    @classmethod
+    def is_valid(cls, directory, count):
+        meta = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta):
+            return False
+        try:
+            with open(meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta.get("version") == cls.VERSION and meta.get("count") == count
+        except Exception:
+            return False
+
+    @classmethod
+    def write(cls, directory, records):
+        """
+        records: iterable of {"db_id","filename","path","text","size_bytes",
+        "modified_time","created_time"}; streamed, texts are not kept.
+        """
+        shutil.rmtree(directory, ignore_errors=True)  # stale layout / half-written
+        os.makedirs(directory, exist_ok=True)
+        ext_ids = {}
+        cols = {name: [] for name in cls.COLUMNS}
+        filenames, paths = [], []
+        offset = 0
+        cols["text_off"].append(0)
+        block = bytearray()
+        stored = 0
+
+        with open(os.path.join(directory, "text.z"), "wb") as tf:
+
+            def flush(first_doc):
+                nonlocal stored
+                cols["block_off"].append(stored)
+                cols["block_first"].append(first_doc)
+                z = zlib.compress(bytes(block), 6)
+                tf.write(z)
+                stored += len(z)
+                block.clear()
+
+            block_start = 0
+            for i, r in enumerate(records):
+                fn = r.get("filename", "") or ""
+                filenames.append(fn)
+                paths.append(r.get("path", "") or "")
+                ext = os.path.splitext(fn)[1].lower()
+                cols["ext"].append(ext_ids.setdefault(ext, len(ext_ids)))
+                cols["db_id"].append(r.get("db_id") or -1)
+                size = r.get("size_bytes")
+                cols["size"].append(int(size) if isinstance(size, (int, float)) else -1)
+                for key, col in (("modified_time", "mtime"), ("created_time", "ctime")):
+                    v = r.get(key)
+                    cols[col].append(float(v) if isinstance(v, (int, float)) else np.nan)
+                blob = (r.get("text", "") or "").encode("utf-8")
+                block += blob
+                offset += len(blob)
+                cols["text_off"].append(offset)
+                if len(block) >= cls.BLOCK_SIZE:
+                    flush(block_start)
+                    block_start = i + 1
+            if block or not cols["block_off"]:
+                flush(block_start)
+            cols["block_off"].append(stored)
+            cols["block_first"].append(len(filenames))
+
+        for name, dtype in cls.COLUMNS.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.array(cols[name], dtype=dtype))
+
+        meta = {
+            "version": cls.VERSION,
+            "count": len(filenames),
+            "text_bytes": offset,
+            "stored_bytes": stored,
+            "exts": sorted(ext_ids, key=ext_ids.get),
+            "filenames": filenames,
+            "paths": paths,
+        }
+        tmp = os.path.join(directory, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+        if offset:
+            print(f"Column store text: {offset} -> {stored} bytes ({offset / max(stored, 1):.1f}x)")
+
+    def _block(self, b):
+        with self._lock:
+            raw = self._blocks.get(b)
+            if raw is not None:
+                self._blocks.move_to_end(b)
+                return raw
+        lo, hi = int(self.cols["block_off"][b]), int(self.cols["block_off"][b + 1])
+        raw = zlib.decompress(self._text[lo:hi])
+        with self._lock:
+            self._blocks[b] = raw
+            if len(self._blocks) > self.CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        return raw
+
+    def text(self, i):
+        off = self.cols["text_off"]
+        start, end = int(off[i]), int(off[i + 1])
+        if start == end or self.closed:
+            return ""
+        first = self.cols["block_first"]
+        b = int(np.searchsorted(first, i, side="right")) - 1
+        try:
+            raw = self._block(b)
+        except ValueError:  # closed between the check and the read
+            return ""
+        base = int(off[int(first[b])])
+        return raw[start - base:end - base].decode("utf-8", errors="replace")
+
+    def field(self, i, key):
+        if key == "text":
+            return self.text(i)
+        if key == "size_bytes":
+            v = int(self.cols["size"][i])
+            return v if v >= 0 else None
+        col = self.cols["mtime" if key == "modified_time" else "ctime"]
+        v = float(col[i])
+        return None if np.isnan(v) else v
+
+    def docs(self, tags_by_db_id=None):
+        """One LazyDoc per row, in store order (= DATA positions)."""
+        tags_by_db_id = tags_by_db_id or {}
+        db_ids = self.cols["db_id"]
+        out = []
+        for i in range(self.count):
+            db_id = int(db_ids[i])
+            d = LazyDoc(
+                filename=self.filenames[i],
+                path=self.paths[i],
+                db_id=db_id,
+                tags=list(tags_by_db_id.get(db_id, [])),
+            )
+            d._cols = self
+            d._i = i
+            out.append(d)
+        return out
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._blocks.clear()
+        try:
+            if isinstance(self._text, mmap.mmap):
+                self._text.close()
+            self._file.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def remove_stale(parent, prefix, keep):
+        """Delete older generations of a root's column dirs (best effort)."""
+        if not os.path.isdir(parent):
+            return
+        for name in os.listdir(parent):
+            if name.startswith(prefix) and name != keep:
+                shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
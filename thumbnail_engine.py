@@ -0,0 +1,184 @@
+import hashlib
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from cache_engine import LRUCache
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def decode_thumbnail(path, size):
+    """
+    Decode an image straight to thumbnail size. With reducing_gap,
+    thumbnail() lets JPEGs decode at a reduced DCT scale (draft) and uses
+    the cheap reduce() step for other formats before the final resample.
+    """
+    with Image.open(path) as img:
+        img.thumbnail(size, reducing_gap=2.0)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        else:
+            img.load()
+        return img
+
+
+class TiledImage:
+    """
+    A large image shown at a fixed display width and cut into horizontal
+    tiles that are rendered on demand. The source is decoded once, at the
+    smallest scale that still covers the display width (JPEG draft, or an
+    integer reduce() for other formats), so a tall screenshot never has
+    to be resampled in full.
+    """
+
+    def __init__(self, path, width, tile_height=512):
+        self.path = path
+        with Image.open(path) as img:
+            w, h = img.size
+        self.width = max(1, min(width, w))
+        self.height = max(1, round(h * self.width / w))
+        self.tile_height = tile_height
+        self._source = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return math.ceil(self.height / self.tile_height)
+
+    def _load(self):
+        with self._lock:
+            if self._source is None:
+                with Image.open(self.path) as img:
+                    img.draft("RGB", (self.width, self.height))
+                    factor = img.width // self.width
+                    src = img.reduce(factor) if factor >= 2 else img.copy()
+                if src.mode not in ("RGB", "L"):
+                    src = src.convert("RGB")
+                self._source = src
+            return self._source
+
+    def tile_box(self, i):
+        """(top, bottom) of tile i in display pixels."""
+        top = i * self.tile_height
+        return top, min(self.height, top + self.tile_height)
+
+    def tile(self, i):
+        """Tile i as a PIL image, display width wide (blocking)."""
+        src = self._load()
+        top, bottom = self.tile_box(i)
+        sy = src.height / self.height
+        return src.resize(
+            (self.width, bottom - top),
+            Image.BILINEAR,
+            box=(0, top * sy, src.width, bottom * sy),
+        )
+
+    def close(self):
+        with self._lock:
+            self._source = None
+
+
+class ThumbnailCache:
+    """
+    Two-level thumbnail cache:
+      memory  LRU of PIL thumbnails keyed by path (with the file signature
+              they were made from)
+      disk    <cache_dir>/<sha1(path|mtime|size|WxH)>.jpg
+    Decoding and disk I/O run on a small background pool; peek() never
+    touches the disk, so cards can render immediately and swap the
+    thumbnail in when request() calls back.
+    """
+
+    def __init__(self, cache_dir, size=(220, 150), max_items=256, workers=2):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory = LRUCache(max_items)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._inflight = {}  # path -> callbacks that joined the running request
+        self._lock = threading.Lock()
+
+    def _disk_path(self, path, sig):
+        key = f"{path}|{sig[0]!r}|{sig[1]}|{self.size[0]}x{self.size[1]}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest() + ".jpg")
+
+    def peek(self, path):
+        """Thumbnail from memory, or None."""
+        hit = self.memory.get(path)
+        return hit[1] if hit else None
+
+    def load(self, path):
+        """Thumbnail via memory, disk or a fresh decode (blocking)."""
+        sig = file_signature(path)
+        if sig is None:
+            return None
+        hit = self.memory.get(path)
+        if hit and hit[0] == sig:
+            return hit[1]
+
+        img = None
+        disk = self._disk_path(path, sig)
+        if os.path.exists(disk):
+            try:
+                with Image.open(disk) as cached:
+                    cached.load()
+                    img = cached.copy()
+            except Exception:
+                img = None
+        if img is None:
+            img = decode_thumbnail(path, self.size)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = disk + ".tmp"
+                img.save(tmp, "JPEG", quality=85)
+                os.replace(tmp, disk)
+            except Exception as e:
+                print("Thumbnail cache write failed:", e)
+        self.memory.put(path, (sig, img))
+        return img
+
+    def request(self, path, callback=None):
+        """
+        Make sure path's thumbnail is current, in the background.
+        callback(path, img) runs on the pool thread when the thumbnail was
+        missing from memory or its file changed; a caller that joins a
+        request already in flight is always called back.
+        """
+        with self._lock:
+            waiters = self._inflight.get(path)
+            if waiters is not None:
+                if callback is not None:
+                    waiters.append(callback)
+                return
+            self._inflight[path] = []
+
+        def work():
+            img, changed = None, False
+            try:
+                before = self.memory.get(path)
+                img = self.load(path)
+                changed = before is None or before[1] is not img
+            except Exception as e:
+                print(f"Thumbnail error ({path}): {e}")
+            finally:
+                with self._lock:
+                    waiters = self._inflight.pop(path, [])
+            if img is None:
+                return
+            callbacks = ([callback] if callback is not None and changed else []) + waiters
+            for cb in callbacks:
+                try:
+                    cb(path, img)
+                except Exception as e:
+                    print("Thumbnail callback error:", e)
+
+        self.pool.submit(work)